@@ -0,0 +1,212 @@
+import argparse
+from typing import List
+
+from sqlalchemy import case, delete, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .database import SessionLocal
+
+
+def get_session(db: Session, session_id: int):
+    return db.query(models.Session).filter(models.Session.id == session_id).first()
+
+
+def _upsert_attendances(db: Session, rows: List[dict]):
+    """Grava todas as presenças em um único INSERT ... ON CONFLICT em lote"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(models.Attendance)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Attendance.session_id, models.Attendance.student_id],
+            set_={"is_present": stmt.excluded.is_present}
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Bancos sem ON CONFLICT: substitui as linhas existentes na mesma transação
+    db.execute(
+        delete(models.Attendance).where(
+            models.Attendance.session_id == rows[0]["session_id"],
+            models.Attendance.student_id.in_([row["student_id"] for row in rows])
+        )
+    )
+    db.execute(insert(models.Attendance), rows)
+
+
+def record_attendance(db: Session, db_session: models.Session, records: List[schemas.AttendanceRecord]):
+    # Se o mesmo aluno vier repetido no payload, vale o último registro
+    present_by_student = {record.student_id: record.is_present for record in records}
+    if not present_by_student:
+        return 0
+
+    enrolled_ids = {
+        user_id for (user_id,) in db.query(models.workshop_enrollments.c.user_id).filter(
+            models.workshop_enrollments.c.workshop_id == db_session.workshop_id,
+            models.workshop_enrollments.c.user_id.in_(present_by_student.keys())
+        )
+    }
+    not_enrolled = sorted(set(present_by_student) - enrolled_ids)
+    if not_enrolled:
+        raise ValueError(f"Students not enrolled in this workshop: {not_enrolled}")
+
+    # Trava a aula: chamadas simultâneas da mesma aula não calculam deltas sobre o mesmo estado
+    db.query(models.Session.id).filter(models.Session.id == db_session.id).with_for_update().one()
+    previous = dict(
+        db.query(models.Attendance.student_id, models.Attendance.is_present).filter(
+            models.Attendance.session_id == db_session.id,
+            models.Attendance.student_id.in_(present_by_student.keys())
+        )
+    )
+
+    rows = [
+        {"session_id": db_session.id, "student_id": student_id, "is_present": is_present}
+        for student_id, is_present in present_by_student.items()
+    ]
+    _upsert_attendances(db, rows)
+    _apply_summary_deltas(db, db_session.workshop_id, _summary_deltas(previous, present_by_student))
+    db.commit()
+    return len(rows)
+
+
+def _summary_deltas(previous: dict, present_by_student: dict) -> List[dict]:
+    """Quanto cada chamada muda os contadores: presença nova soma no total, correção só no present"""
+    deltas = []
+    for student_id, is_present in present_by_student.items():
+        if student_id in previous:
+            present_delta = int(bool(is_present)) - int(bool(previous[student_id]))
+            total_delta = 0
+        else:
+            present_delta = int(bool(is_present))
+            total_delta = 1
+        if present_delta or total_delta:
+            deltas.append({"student_id": student_id, "present_count": present_delta, "total_count": total_delta})
+    return deltas
+
+
+def _apply_summary_deltas(db: Session, workshop_id: int, deltas: List[dict]):
+    if not deltas:
+        return
+    summary = models.AttendanceSummary
+    rows = [dict(delta, workshop_id=workshop_id) for delta in deltas]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(summary)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[summary.workshop_id, summary.student_id],
+            set_={
+                "present_count": summary.present_count + stmt.excluded.present_count,
+                "total_count": summary.total_count + stmt.excluded.total_count,
+            }
+        )
+        db.execute(stmt, rows)
+        return
+
+    existing = {
+        student_id for (student_id,) in db.query(summary.student_id).filter(
+            summary.workshop_id == workshop_id,
+            summary.student_id.in_([row["student_id"] for row in rows])
+        )
+    }
+    for row in rows:
+        if row["student_id"] in existing:
+            db.execute(
+                update(summary)
+                .where(summary.workshop_id == workshop_id, summary.student_id == row["student_id"])
+                .values(
+                    present_count=summary.present_count + row["present_count"],
+                    total_count=summary.total_count + row["total_count"],
+                )
+            )
+        else:
+            db.execute(insert(summary).values(**row))
+
+
+def summary_select():
+    """Contadores recalculados a partir de todas as presenças (mesma conta da migração 0007)"""
+    return (
+        select(
+            models.Session.workshop_id,
+            models.Attendance.student_id,
+            func.sum(case((models.Attendance.is_present == True, 1), else_=0)),
+            func.count(models.Attendance.id),
+        )
+        .join(models.Session, models.Session.id == models.Attendance.session_id)
+        .where(models.Session.workshop_id.isnot(None), models.Attendance.student_id.isnot(None))
+        .group_by(models.Session.workshop_id, models.Attendance.student_id)
+    )
+
+
+def rebuild_summaries(db: Session, workshop_id: int = None) -> int:
+    """Recalcula os contadores em lote, com um DELETE e um INSERT ... SELECT.
+
+    Trava as mesmas linhas de aula que o record_attendance (e, no Postgres, a tabela de
+    resumos), para que uma chamada em andamento não aplique deltas sobre um resumo
+    apagado ou ainda não recalculado.
+    """
+    summary = models.AttendanceSummary
+    clear = delete(summary)
+    source = summary_select()
+    sessions = db.query(models.Session.id)
+    if workshop_id is not None:
+        clear = clear.where(summary.workshop_id == workshop_id)
+        source = source.where(models.Session.workshop_id == workshop_id)
+        sessions = sessions.filter(models.Session.workshop_id == workshop_id)
+    # Mesma ordem do record_attendance (aulas, depois resumos) para não haver deadlock
+    sessions.with_for_update().all()
+    if db.get_bind().dialect.name == "postgresql":
+        # Também cobre aulas criadas depois do SELECT ... FOR UPDATE acima
+        db.execute(text(f"LOCK TABLE {summary.__tablename__} IN EXCLUSIVE MODE"))
+    db.execute(clear)
+    db.execute(
+        insert(summary).from_select(
+            [summary.workshop_id, summary.student_id, summary.present_count, summary.total_count],
+            source
+        )
+    )
+    db.commit()
+    query = db.query(func.count()).select_from(summary)
+    if workshop_id is not None:
+        query = query.filter(summary.workshop_id == workshop_id)
+    return query.scalar()
+
+
+def get_workshop_summary(db: Session, workshop_id: int):
+    """Taxas de presença dos alunos de uma oficina, direto da tabela de resumo"""
+    summary = models.AttendanceSummary
+    rows = db.query(summary, models.User.name).join(
+        models.User, models.User.id == summary.student_id
+    ).filter(summary.workshop_id == workshop_id).order_by(summary.student_id).all()
+    return [
+        {
+            "student_id": row.student_id,
+            "student_name": name,
+            "present_count": row.present_count,
+            "total_count": row.total_count,
+            "attendance_rate": row.attendance_rate,
+        }
+        for row, name in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do resumo de presenças")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild = subcommands.add_parser("rebuild", help="recalcula attendance_summaries a partir das presenças")
+    rebuild.add_argument("--workshop-id", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rows = rebuild_summaries(db, workshop_id=args.workshop_id)
+            print(f"attendance_summaries rebuilt: {rows} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
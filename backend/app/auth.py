@@ -1,35 +1,227 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import bcrypt
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import hashlib
+import hmac
 import os
+import threading
+import time
 
 from . import models, schemas
-from .database import get_db
+from .batch import PRINCIPAL_SCOPE_KEY
+from .metrics import registry as metrics_registry
+from .database import DATABASE_ASYNC, get_async_db, get_db
 
 SECRET_KEY = os.getenv("SECRET_KEY", "ellp-oficinas-secret-key-2024-super-segura")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+# Custo do bcrypt e quantas verificações rodam em paralelo fora do event loop
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# A importação em massa usa um pool separado para não enfileirar na frente dos logins
+PASSWORD_IMPORT_WORKERS = int(os.getenv("PASSWORD_IMPORT_WORKERS", str(max(PASSWORD_HASH_WORKERS // 2, 1))))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+# O bcrypt libera o GIL, então threads bastam para usar vários núcleos
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_import_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_IMPORT_WORKERS, thread_name_prefix="password-import"
+)
+
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith("$2")
+
+
 def verify_password(plain_password, hashed_password):
-    """Verifica senha usando SHA256"""
-    return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password
+    """Verifica senha com bcrypt, aceitando os hashes SHA256 antigos"""
+    if not _is_bcrypt_hash(hashed_password):
+        legacy_hash = hashlib.sha256(plain_password.encode()).hexdigest()
+        return hmac.compare_digest(legacy_hash, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        return False
 
 
 def get_password_hash(password):
-    """Gera hash da senha usando SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Gera hash da senha usando bcrypt"""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=PASSWORD_HASH_ROUNDS)).decode()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Hashes SHA256 ou com custo diferente do configurado são regravados no login"""
+    if not _is_bcrypt_hash(hashed_password):
+        return True
+    try:
+        return int(hashed_password.split("$")[2]) != PASSWORD_HASH_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def verify_password_async(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, get_password_hash, password)
+
+
+def get_password_hash_pooled(password):
+    """Versão para código síncrono (threadpool): o bcrypt roda no mesmo pool dos logins,
+    que limita quantos hashes disputam a CPU ao mesmo tempo"""
+    return _password_hash_executor.submit(get_password_hash, password).result()
+
+
+def hash_passwords(passwords):
+    """Gera vários hashes em paralelo no pool da importação em massa"""
+    return list(_password_import_executor.map(get_password_hash, passwords))
+
+
+def _user_columns(user: models.User) -> dict:
+    return {column.key: getattr(user, column.key) for column in models.User.__table__.columns}
+
+
+def detached_user(user: models.User) -> models.User:
+    """Cópia do usuário fora de qualquer sessão, como as devolvidas pelo cache"""
+    return models.User(**_user_columns(user))
+
+
+class PrincipalCache:
+    """Cache LRU com TTL dos usuários autenticados, indexado pelo subject (email) do token.
+
+    Guarda só os valores das colunas; cada acerto devolve um models.User novo,
+    desligado de qualquer sessão do banco.
+
+    Cada invalidação incrementa a geração da chave. Quem vai ao banco pega a
+    geração antes (read_token) e o set() descarta o resultado se a chave foi
+    invalidada no meio, para que uma leitura antiga não volte ao cache.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stale_sets = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def read_token(self, key: str):
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+        return models.User(**data)
+
+    def set(self, key: str, user: models.User, token=None):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        data = _user_columns(user)
+        with self._lock:
+            if token is not None and token != (self._epoch, self._generations.get(key, 0)):
+                self.stale_sets += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if len(self._generations) > max(self.max_size, 1):
+                # Limita a memória: trocar de época invalida todas as leituras em andamento
+                self._generations.clear()
+                self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_sets": self.stale_sets,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _principal_cache_metrics():
+    stats = principal_cache.stats()
+    return [
+        "# HELP principal_cache_requests_total Principal cache lookups, by result.",
+        "# TYPE principal_cache_requests_total counter",
+        f'principal_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'principal_cache_requests_total{{result="miss"}} {stats["misses"]}',
+        "# HELP principal_cache_stale_sets_total Cache fills discarded because the user changed during the lookup.",
+        "# TYPE principal_cache_stale_sets_total counter",
+        f"principal_cache_stale_sets_total {stats['stale_sets']}",
+        "# HELP principal_cache_entries Principals currently cached.",
+        "# TYPE principal_cache_entries gauge",
+        f"principal_cache_entries {stats['size']}",
+    ]
+
+
+metrics_registry.collectors.append(_principal_cache_metrics)
+
+
+def invalidate_principal(*emails):
+    """Deve ser chamada sempre que dados de um usuário mudam (papel, status, senha...)"""
+    for email in emails:
+        if email:
+            principal_cache.invalidate(email)
 
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
@@ -39,6 +231,35 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 
+def _store_password_hash(db: Session, user: models.User, password_hash: str):
+    user.password_hash = password_hash
+    db.commit()
+    db.refresh(user)
+
+
+async def authenticate_user_async(db, email: str, password: str):
+    """Autentica sem travar o event loop: a consulta roda na sessão assíncrona ou no
+    threadpool e o bcrypt no pool de hash. Hashes antigos são atualizados aqui."""
+    if isinstance(db, AsyncSession):
+        user = await get_user_by_email_async(db, email)
+    else:
+        user = await run_in_threadpool(get_user_by_email, db, email)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.password_hash):
+        return False
+
+    if password_needs_rehash(user.password_hash):
+        new_hash = await get_password_hash_async(password)
+        if isinstance(db, AsyncSession):
+            user.password_hash = new_hash
+            await db.commit()
+        else:
+            await run_in_threadpool(_store_password_hash, db, user, new_hash)
+        invalidate_principal(email)
+    return user
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -50,33 +271,81 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception(detail: str = "Could not validate credentials"):
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+        detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = schemas.TokenData(email=email)
     except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_exception("Token expired")
     except jwt.InvalidTokenError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return token_data.email
+
+
+def load_principal(db: Session, email: str) -> models.User:
+    """Usuário do token, pelo cache ou pelo banco, desligado da sessão"""
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    token = principal_cache.read_token(email)
+    user = get_user_by_email(db, email=email)
+    if user is None:
+        raise _credentials_exception()
+    principal_cache.set(email, user, token)
+    principal = detached_user(user)
+    # Encerra a transação de leitura: a conexão volta ao pool antes de o endpoint
+    # esperar por outra thread do threadpool (evita esgotar o pool sob carga)
+    db.rollback()
+    return principal
 
-    user = get_user_by_email(db, email=token_data.email)
+
+def scope_principal(request: Request):
+    """Usuário já autenticado pelo /batch para esta sub-requisição, se houver"""
+    principal = request.scope.get(PRINCIPAL_SCOPE_KEY)
+    return detached_user(principal) if principal is not None else None
+
+
+def get_current_user_sync(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # Dependência síncrona: o FastAPI a executa no threadpool, fora do event loop
+    principal = scope_principal(request)
+    if principal is not None:
+        return principal
+    return load_principal(db, decode_token_subject(token))
+
+
+async def get_current_user_async(request: Request, token: str = Depends(oauth2_scheme),
+                                 db: AsyncSession = Depends(get_async_db)):
+    principal = scope_principal(request)
+    if principal is not None:
+        return principal
+    email = decode_token_subject(token)
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    token = principal_cache.read_token(email)
+    user = await get_user_by_email_async(db, email=email)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    principal_cache.set(email, user, token)
     return user
 
 
+get_current_user = get_current_user_async if DATABASE_ASYNC else get_current_user_sync
+
+
 async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+# Quantas sub-requisições rodam ao mesmo tempo (cada uma usa a própria sessão do banco)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT_SECONDS", "10"))
+# Cada resposta é montada inteira em memória; acima disso a sub-requisição vira 413
+BATCH_MAX_BODY_BYTES = int(os.getenv("BATCH_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+
+BATCH_PATH = "/batch"
+# Chave do scope ASGI onde o /batch deixa o usuário já resolvido
+PRINCIPAL_SCOPE_KEY = "ellp.principal"
+# Headers da requisição original repassados para cada sub-requisição
+FORWARDED_HEADERS = {b"authorization", b"accept-language", b"user-agent"}
+# Headers da resposta que interessam ao cliente
+RETURNED_HEADERS = {"etag", "last-modified", "x-next-cursor"}
+# Só leituras de tamanho limitado podem ser agrupadas. Stream (SSE), exportação CSV
+# e rotas de operação ficam de fora: seriam bufferizadas inteiras na memória.
+BATCHABLE_PATHS = [re.compile(pattern) for pattern in (
+    r"/workshops/?",
+    r"/workshops/(facets|my-workshops|search)",
+    r"/workshops/\d+",
+    r"/workshops/\d+/(students|attendance-summary)",
+    r"/users/?",
+    r"/users/students/?",
+    r"/users/me",
+    r"/users/me/(enrollments|enrollments-direct)",
+    r"/users/\d+",
+    r"/users/\d+/enrollments",
+)]
+
+
+class _ResponseTooLarge(Exception):
+    pass
+
+
+def validate_path(path: str) -> str:
+    if not path.startswith("/") or path.startswith("//"):
+        raise ValueError("Batch paths must be absolute paths like /workshops/")
+    route = urlsplit(path).path
+    if route.rstrip("/") == BATCH_PATH:
+        raise ValueError("Nested batch requests are not allowed")
+    if not any(pattern.fullmatch(route) for pattern in BATCHABLE_PATHS):
+        raise ValueError(f"Path cannot be batched: {route}")
+    return path
+
+
+def _sub_scope(parent_scope, path: str, principal) -> dict:
+    parts = urlsplit(path)
+    headers = [(name, value) for name, value in parent_scope["headers"] if name in FORWARDED_HEADERS]
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": parent_scope.get("scheme", "http"),
+        "server": parent_scope.get("server"),
+        "client": parent_scope.get("client"),
+        "root_path": parent_scope.get("root_path", ""),
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "headers": headers,
+    }
+    if principal is not None:
+        scope[PRINCIPAL_SCOPE_KEY] = principal
+    return scope
+
+
+async def _call(app, scope) -> dict:
+    response = {"status": 500, "headers": {}, "body": b""}
+    chunks = []
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in message.get("headers", [])
+                if name.decode("latin-1").lower() in RETURNED_HEADERS
+            }
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            size += len(body)
+            if size > BATCH_MAX_BODY_BYTES:
+                # Interrompe a rota em vez de continuar acumulando
+                raise _ResponseTooLarge()
+            chunks.append(body)
+
+    try:
+        await app(scope, receive, send)
+    except _ResponseTooLarge:
+        return {"status": 413, "headers": {},
+                "body": b'{"detail":"Batch sub-response too large"}'}
+    except Exception:
+        # O ServerErrorMiddleware já respondeu 500 e registrou o erro; só não deixa
+        # uma sub-requisição derrubar as demais
+        logger.exception("Batch sub-request failed: %s", scope["path"])
+    response["body"] = b"".join(chunks)
+    return response
+
+
+def _decode_body(body: bytes):
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", errors="replace")
+
+
+async def dispatch(app, parent_scope, items, principal=None) -> list:
+    """Executa as sub-requisições GET no próprio app ASGI, em paralelo, sem passar pela rede.
+
+    Cada uma atravessa a pilha completa de middlewares e rotas; o usuário já
+    resolvido vai no scope para que get_current_user não refaça o trabalho.
+    """
+    semaphore = asyncio.Semaphore(max(BATCH_MAX_CONCURRENCY, 1))
+
+    async def run(item):
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    _call(app, _sub_scope(parent_scope, item.path, principal)),
+                    timeout=BATCH_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                return {"id": item.id, "status": 504, "headers": {},
+                        "body": {"detail": "Batch sub-request timed out"}}
+        return {"id": item.id, "status": result["status"], "headers": result["headers"],
+                "body": _decode_body(result["body"])}
+
+    return await asyncio.gather(*(run(item) for item in items))
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import models
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Janela em que mudanças da mesma oficina são agrupadas em um único evento
+EVENTS_FLUSH_INTERVAL_SECONDS = float(os.getenv("EVENTS_FLUSH_INTERVAL_SECONDS", "0.25"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Clientes que acumulam mais eventos que isso sem ler são desconectados
+EVENTS_CLIENT_QUEUE_SIZE = int(os.getenv("EVENTS_CLIENT_QUEUE_SIZE", "100"))
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _load_workshop_states(workshop_ids) -> dict:
+    """Uma única query para todas as oficinas alteradas no intervalo"""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            models.Workshop.id,
+            models.Workshop.enrolled_count,
+            models.Workshop.max_students,
+            models.Workshop.is_published,
+            models.Workshop.is_completed,
+        ).filter(models.Workshop.id.in_(workshop_ids)).all()
+        return {row.id: row for row in rows}
+    finally:
+        db.close()
+
+
+def _workshop_event(workshop_id: int, row) -> str:
+    if row is None:
+        return format_event("deleted", {"id": workshop_id})
+    if not row.is_published:
+        # Oficina despublicada: o cliente só precisa saber que ela saiu do catálogo
+        return format_event("workshop", {"id": workshop_id, "is_published": False})
+    enrolled = row.enrolled_count or 0
+    return format_event("workshop", {
+        "id": workshop_id,
+        "is_published": True,
+        "is_completed": row.is_completed,
+        "max_students": row.max_students,
+        "enrolled_count": enrolled,
+        "available_spots": max(row.max_students - enrolled, 0),
+    })
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=EVENTS_CLIENT_QUEUE_SIZE)
+        self.dropped = False
+
+
+class WorkshopBroadcaster:
+    """Distribui mudanças de vagas e publicação para os clientes SSE deste processo.
+
+    publish() pode ser chamado de qualquer thread (os endpoints síncronos rodam no
+    threadpool). Os ids pendentes ficam num conjunto, então várias mudanças da mesma
+    oficina no intervalo viram um evento só; cada lote custa uma query e o texto de
+    cada evento é montado uma vez e enfileirado para todos os clientes.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    def publish(self, *workshop_ids):
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        with self._lock:
+            was_idle = not self._pending
+            self._pending.update(workshop_ids)
+        if was_idle:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Loop já encerrado (fim do processo ou dos testes)
+                pass
+
+    def subscribe(self) -> Subscriber:
+        self._ensure_running()
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "pending": len(self._pending)}
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._subscribers = set()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(EVENTS_FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            with self._lock:
+                workshop_ids, self._pending = self._pending, set()
+            if not workshop_ids or not self._subscribers:
+                continue
+            try:
+                states = await run_in_threadpool(_load_workshop_states, workshop_ids)
+            except Exception:
+                logger.exception("Failed to load workshop states for %d events", len(workshop_ids))
+                continue
+            self._fan_out([_workshop_event(workshop_id, states.get(workshop_id))
+                           for workshop_id in sorted(workshop_ids)])
+
+    def _fan_out(self, messages):
+        for subscriber in list(self._subscribers):
+            try:
+                for message in messages:
+                    subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente lento: desconecta em vez de acumular memória; o EventSource reconecta
+                subscriber.dropped = True
+                self._subscribers.discard(subscriber)
+                logger.info("Dropping slow SSE client (%d queued events)", subscriber.queue.qsize())
+
+
+broadcaster = WorkshopBroadcaster()
+
+
+def publish_workshop_change(*workshop_ids):
+    """Chamada depois do commit de qualquer mudança de vagas ou publicação"""
+    broadcaster.publish(*workshop_ids)
+
+
+async def stream_workshop_events(request):
+    subscriber = broadcaster.subscribe()
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        while not subscriber.dropped:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                message = ": heartbeat\n\n"
+            yield message
+    finally:
+        broadcaster.unsubscribe(subscriber)
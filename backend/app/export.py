@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import os
+
+from sqlalchemy import select
+
+from . import models
+from .database import read_only_session
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+ENROLLMENT_COLUMNS = (
+    models.workshop_enrollments.c.user_id,
+    models.User.name.label("user_name"),
+    models.User.email.label("user_email"),
+    models.User.role.label("user_role"),
+    models.workshop_enrollments.c.workshop_id,
+    models.Workshop.title.label("workshop_title"),
+    models.Workshop.professor_id,
+)
+ENROLLMENT_FIELDS = [column.key for column in ENROLLMENT_COLUMNS]
+
+
+def _enrollments_statement():
+    # Só as colunas necessárias, sem montar objetos ORM
+    return (
+        select(*ENROLLMENT_COLUMNS)
+        .select_from(models.workshop_enrollments)
+        .join(models.User, models.User.id == models.workshop_enrollments.c.user_id)
+        .join(models.Workshop, models.Workshop.id == models.workshop_enrollments.c.workshop_id)
+        .order_by(models.workshop_enrollments.c.workshop_id, models.workshop_enrollments.c.user_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _iter_enrollment_batches():
+    """Lê as inscrições com cursor no servidor, um lote de cada vez.
+
+    Abre a própria sessão porque a resposta continua sendo enviada depois que
+    o endpoint retorna.
+    """
+    # Leitura longa e sem escrita: vai para a réplica, se houver uma
+    db = read_only_session()
+    try:
+        result = db.execute(_enrollments_statement())
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def iter_enrollments_ndjson():
+    for batch in _iter_enrollment_batches():
+        yield "".join(json.dumps(dict(row._mapping), ensure_ascii=False) + "\n" for row in batch)
+
+
+def iter_enrollments_csv():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ENROLLMENT_FIELDS)
+    for batch in _iter_enrollment_batches():
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
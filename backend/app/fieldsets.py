@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic import ConfigDict, TypeAdapter, create_model
+from sqlalchemy.orm import load_only
+from starlette.responses import Response
+
+# Sempre carregados: identificam o item e formam o cursor da paginação por chave
+KEY_FIELDS = ("id", "created_at")
+
+# Campos calculados e as colunas de que dependem
+DERIVED_FIELDS = {
+    "available_spots": ("max_students", "enrolled_count"),
+}
+
+
+def parse_fields(fields: Optional[str], schema) -> Optional[tuple]:
+    """Converte ?fields=a,b em uma tupla ordenada de campos do schema.
+
+    Retorna None quando o parâmetro não foi enviado (resposta completa).
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+def columns_for(model, fields) -> list:
+    """Atributos do model que precisam ser carregados para servir os campos pedidos"""
+    names = set(KEY_FIELDS)
+    for name in fields:
+        names.update(DERIVED_FIELDS.get(name, (name,)))
+    table_columns = model.__table__.columns
+    return [getattr(model, name) for name in names if name in table_columns]
+
+
+def load_columns(model, fields):
+    """Opção load_only equivalente a columns_for"""
+    return load_only(*columns_for(model, fields))
+
+
+def with_fields(query, model, fields):
+    if fields is None:
+        return query
+    return query.options(load_columns(model, fields))
+
+
+@lru_cache(maxsize=256)
+def reduced_model(schema, fields: tuple):
+    """Schema com apenas os campos pedidos, criado uma vez por combinação"""
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name])
+                   for name in fields}
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions
+    )
+
+
+@lru_cache(maxsize=256)
+def _list_adapter(schema, fields: tuple) -> TypeAdapter:
+    return TypeAdapter(List[reduced_model(schema, fields)])
+
+
+def fields_response(items, schema, fields: tuple, headers=None) -> Response:
+    """Serializa direto para JSON com o schema reduzido, sem passar pelo response_model"""
+    adapter = _list_adapter(schema, fields)
+    content = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    return Response(content, media_type="application/json", headers=dict(headers or {}))
@@ -0,0 +1,40 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime
+
+from fastapi import Request, Response
+
+ETAG_HEADER = "ETag"
+
+
+def make_etag(*parts) -> str:
+    """ETag forte calculado a partir dos valores de versão do recurso"""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _http_date(moment) -> str:
+    if moment.tzinfo is None:
+        # SQLite devolve datas sem fuso; o servidor grava em UTC
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified=None) -> dict:
+    # no-cache: o cliente pode guardar a resposta, mas revalida sempre com If-None-Match
+    headers = {ETAG_HEADER: etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified=None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
@@ -1,17 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import APIRouter, FastAPI, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from datetime import timedelta
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy.orm import Session, selectinload
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import logging
+import os
+from typing import List, Optional
 
 from . import models, schemas
-from .database import SessionLocal, engine, get_db
+from . import database
+from .database import SessionLocal, get_auth_db, get_db
 from .auth import (
-    authenticate_user, create_access_token, get_current_active_user,
-    get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+    authenticate_user_async, create_access_token, decode_token_subject, get_current_active_user,
+    get_password_hash, load_principal, ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from . import attendance
+from . import batch
+from . import events
+from . import export
 from . import users
+from . import users_crud
+from . import user_import
 from . import workshops
+from .fieldsets import columns_for, fields_response, parse_fields, with_fields
+from .http_cache import ETAG_HEADER, cache_headers, etag_matches, make_etag, not_modified
+from .pagination import NEXT_CURSOR_HEADER
+from .metrics import MetricsMiddleware, metrics_response
+from .pool import pool_status
+from .replica import ReadYourWritesMiddleware, get_read_db
+from .query_stats import SQL_COUNT_HEADER, SQL_TIME_HEADER, QueryStatsMiddleware
 
 # Adicionar import no topo do arquivo
 from . users_crud import (
@@ -19,22 +39,21 @@ from . users_crud import (
     get_users_by_role, authenticate_user
 )
 
-models.Base.metadata.create_all(bind=engine)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="ELLP Oficinas API", version="1.0.0")
+# DB_CREATE_ALL=false em produção: o schema vem das migrações do Alembic
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "true").lower() in ("1", "true", "yes")
 
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+router = APIRouter()
 
-@app.post("/token", response_model=schemas.Token)
-async def login_for_access_token(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = authenticate_user(db, login_data.email, login_data.password)
+@router.post("/token", response_model=schemas.Token)
+async def login_for_access_token(login_data: schemas.LoginRequest, db=Depends(get_auth_db)):
+    # Consulta e bcrypt rodam fora do event loop, em qualquer modo de banco
+    user = await authenticate_user_async(db, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,8 +67,48 @@ async def login_for_access_token(login_data: schemas.LoginRequest, db: Session =
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+def _load_batch_principal(email: str):
+    db = SessionLocal()
+    try:
+        return load_principal(db, email)
+    finally:
+        db.close()
+
+
+@router.post("/batch", response_model=schemas.BatchResponse)
+async def run_batch(batch_request: schemas.BatchRequest, request: Request):
+    """Executa várias leituras (GET) em uma só ida e volta. O token é validado uma
+    vez aqui e o usuário resolvido é reaproveitado por todas as sub-requisições"""
+    principal = None
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() == "bearer" and token:
+        email = decode_token_subject(token)
+        principal = await run_in_threadpool(_load_batch_principal, email)
+
+    responses = await batch.dispatch(request.app, request.scope, batch_request.requests, principal)
+    return {"responses": responses}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return metrics_response()
+
+
+@router.get("/admin/db-pool")
+def read_db_pool_status(current_user: models.User = Depends(get_current_active_user)):
+    """Ocupação e tempo de espera dos pools de conexão do banco"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    return {
+        "sync": pool_status(database.engine),
+        "replica": pool_status(database.replica_engine),
+        "async": pool_status(database.async_engine),
+    }
+
+
 # User Routes
-@app.post("/users/", response_model=schemas.User)
+@router.post("/users/", response_model=schemas.User)
 def create_user_endpoint(user: schemas.UserCreate, db: Session = Depends(get_db)):
     try:
         return users.create_user(db=db, user=user)
@@ -57,12 +116,31 @@ def create_user_endpoint(user: schemas.UserCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/users/me", response_model=schemas.User)
+@router.post("/users/import", response_model=schemas.UserImportResult)
+def import_users_endpoint(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Cadastro em massa a partir de CSV ou NDJSON (email, name, role, password)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    try:
+        fmt = user_import.detect_format(file.filename, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return user_import.import_users(db, file.file, fmt)
+
+
+@router.get("/users/me", response_model=schemas.User)
 async def read_users_me(current_user: models.User = Depends(get_current_active_user)):
+    # Vem do cache de usuários; num cache miss a busca é feita no primário
     return current_user
 
 
-@app.get("/users/{user_id}", response_model=schemas.User)
+@router.get("/users/{user_id}", response_model=schemas.User)
 def read_user(user_id: int, db: Session = Depends(get_db)):
     db_user = users.get_user(db, user_id=user_id)
     if db_user is None:
@@ -71,7 +149,7 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
 
 
 # Workshop Routes
-@app.post("/workshops/", response_model=schemas.Workshop)
+@router.post("/workshops/", response_model=schemas.Workshop)
 def create_workshop_endpoint(
         workshop: schemas.WorkshopCreate,
         db: Session = Depends(get_db),
@@ -83,17 +161,104 @@ def create_workshop_endpoint(
     return workshops.create_workshop(db=db, workshop=workshop, professor_id=current_user.id)
 
 
-@app.get("/workshops/", response_model=List[schemas.Workshop])
+def selected_fields(fields: Optional[str], schema):
+    try:
+        return parse_fields(fields, schema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def fields_or_full(items, schema, fields, response: Response = None):
+    """Com ?fields= serializa com o schema reduzido; sem ele, deixa o response_model agir"""
+    if fields is None:
+        return items
+    return fields_response(items, schema, fields, response.headers if response is not None else None)
+
+
+def workshop_filters(
+        theme: Optional[str] = None,
+        professor_id: Optional[int] = None,
+        starts_after: Optional[datetime] = None,
+        starts_before: Optional[datetime] = None,
+        has_free_seats: Optional[bool] = None,
+        is_completed: Optional[bool] = None
+) -> schemas.WorkshopFilters:
+    """Filtros da listagem de oficinas, aplicados no SQL"""
+    return schemas.WorkshopFilters(
+        theme=theme,
+        professor_id=professor_id,
+        starts_after=starts_after,
+        starts_before=starts_before,
+        has_free_seats=has_free_seats,
+        is_completed=is_completed,
+    )
+
+
+@router.get("/workshops/", response_model=List[schemas.Workshop])
 def read_workshops(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
         published_only: bool = False,
-        db: Session = Depends(get_db)
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        filters: schemas.WorkshopFilters = Depends(workshop_filters),
+        db: Session = Depends(get_read_db)
+):
+    """Paginação por offset (skip) ou por cursor: envie cursor= vazio para a primeira
+    página e o valor do header X-Next-Cursor para as seguintes. fields=title,start_date
+    limita as colunas carregadas e devolvidas"""
+    selected = selected_fields(fields, schemas.Workshop)
+    # Revalidação barata: um agregado decide o 304 antes de carregar as oficinas
+    version = workshops.get_workshops_version(db, published_only=published_only, filters=filters)
+    etag = make_etag("workshops", str(request.query_params), *version)
+    if etag_matches(request, etag):
+        return not_modified(etag, version.last_modified)
+    response.headers.update(cache_headers(etag, version.last_modified))
+
+    if cursor is None:
+        items = workshops.get_workshops(
+            db, skip=skip, limit=limit, published_only=published_only, filters=filters, fields=selected
+        )
+        return fields_or_full(items, schemas.Workshop, selected, response)
+
+    try:
+        items, next_cursor = workshops.get_workshops_page(
+            db, cursor=cursor, limit=limit, published_only=published_only, filters=filters, fields=selected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return fields_or_full(items, schemas.Workshop, selected, response)
+
+
+@router.get("/workshops/facets", response_model=schemas.WorkshopFacets)
+def read_workshop_facets(
+        published_only: bool = False,
+        filters: schemas.WorkshopFilters = Depends(workshop_filters),
+        db: Session = Depends(get_read_db)
 ):
-    return workshops.get_workshops(db, skip=skip, limit=limit, published_only=published_only)
+    """Contagens por tema e de vagas para os mesmos filtros da listagem"""
+    return workshops.get_workshop_facets(db, published_only=published_only, filters=filters)
+
 
+@router.get("/workshops/stream")
+async def stream_workshops(request: Request):
+    """Server-Sent Events com as mudanças de vagas e de publicação das oficinas.
 
-@app.get("/workshops/my-workshops", response_model=List[schemas.Workshop])
+    Substitui o polling da listagem: o cliente carrega /workshops/ uma vez e aplica
+    os eventos "workshop" e "deleted" recebidos aqui.
+    """
+    return StreamingResponse(
+        events.stream_workshop_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/workshops/my-workshops", response_model=List[schemas.Workshop])
 def read_my_workshops(
         db: Session = Depends(get_db),
         current_user: models.User = Depends(get_current_active_user)
@@ -101,15 +266,35 @@ def read_my_workshops(
     return workshops.get_user_workshops(db, user_id=current_user.id)
 
 
-@app.get("/workshops/{workshop_id}", response_model=schemas.Workshop)
-def read_workshop(workshop_id: int, db: Session = Depends(get_db)):
+@router.get("/workshops/search", response_model=List[schemas.Workshop])
+def search_workshops_endpoint(
+        q: str = Query(..., min_length=1, max_length=200),
+        skip: int = 0,
+        limit: int = Query(20, le=100),
+        published_only: bool = False,
+        db: Session = Depends(get_read_db)
+):
+    """Busca por título, descrição, tema e pré-requisitos, ordenada por relevância"""
+    return workshops.search_workshops(db, q, skip=skip, limit=limit, published_only=published_only)
+
+
+@router.get("/workshops/{workshop_id}", response_model=schemas.Workshop)
+def read_workshop(workshop_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    version = workshops.get_workshop_version(db, workshop_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    etag = make_etag("workshop", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag, version.last_modified)
+    response.headers.update(cache_headers(etag, version.last_modified))
+
     db_workshop = workshops.get_workshop(db, workshop_id=workshop_id)
     if db_workshop is None:
         raise HTTPException(status_code=404, detail="Workshop not found")
     return db_workshop
 
 
-@app.put("/workshops/{workshop_id}", response_model=schemas.Workshop)
+@router.put("/workshops/{workshop_id}", response_model=schemas.Workshop)
 def update_workshop_endpoint(
         workshop_id: int,
         workshop_update: schemas.WorkshopUpdate,
@@ -129,7 +314,7 @@ def update_workshop_endpoint(
     return updated_workshop
 
 
-@app.post("/workshops/{workshop_id}/enroll")
+@router.post("/workshops/{workshop_id}/enroll")
 def enroll_in_workshop(
         workshop_id: int,
         db: Session = Depends(get_db),
@@ -139,13 +324,45 @@ def enroll_in_workshop(
         raise HTTPException(status_code=403, detail="Only students can enroll in workshops")
 
     try:
-        workshop = workshops.enroll_student(db, workshop_id, current_user.id)
-        return {"message": "Successfully enrolled in workshop"}
+        enrolled = workshops.enroll_student(db, workshop_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if enrolled is None:
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    return {"message": "Successfully enrolled in workshop"}
+
+
+@router.post("/workshops/{workshop_id}/waitlist", response_model=schemas.WaitlistPosition)
+def join_workshop_waitlist(
+        workshop_id: int,
+        db: Session = Depends(get_db),
+        current_user: models.User = Depends(get_current_active_user)
+):
+    """Entra na fila de uma oficina lotada; a primeira vaga liberada é do primeiro da fila"""
+    if current_user.role != "aluno":
+        raise HTTPException(status_code=403, detail="Only students can join waitlists")
+
+    try:
+        position = workshops.join_waitlist(db, workshop_id, current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if position is None:
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    return {"workshop_id": workshop_id, "position": position}
 
 
-@app.get("/workshops/{workshop_id}/students")
+@router.delete("/workshops/{workshop_id}/waitlist")
+def leave_workshop_waitlist(
+        workshop_id: int,
+        db: Session = Depends(get_db),
+        current_user: models.User = Depends(get_current_active_user)
+):
+    if not workshops.leave_waitlist(db, workshop_id, current_user.id):
+        raise HTTPException(status_code=400, detail="Student is not on the waitlist for this workshop")
+    return {"message": "Successfully left the waitlist"}
+
+
+@router.get("/workshops/{workshop_id}/students")
 def get_workshop_students_endpoint(
         workshop_id: int,
         db: Session = Depends(get_db),
@@ -160,7 +377,7 @@ def get_workshop_students_endpoint(
 
     return workshops.get_workshop_students(db, workshop_id)
 
-@app.delete("/workshops/{workshop_id}")
+@router.delete("/workshops/{workshop_id}")
 def delete_workshop_endpoint(
     workshop_id: int,
     db: Session = Depends(get_db),
@@ -181,7 +398,7 @@ def delete_workshop_endpoint(
     return {"message": "Workshop deleted successfully"}
 
 
-@app.delete("/workshops/{workshop_id}/enroll")
+@router.delete("/workshops/{workshop_id}/enroll")
 def unenroll_from_workshop(
     workshop_id: int,
     db: Session = Depends(get_db),
@@ -194,49 +411,99 @@ def unenroll_from_workshop(
     if not workshop:
         raise HTTPException(status_code=404, detail="Workshop not found")
     
-    # Verificar se o aluno está inscrito
-    if not any(student.id == current_user.id for student in workshop.students):
+    # Remove só a linha de inscrição do aluno; a vaga vai para o primeiro da fila de espera
+    # ou volta ao contador
+    if not workshops.unenroll_student(db, workshop_id, current_user.id):
         raise HTTPException(status_code=400, detail="Student is not enrolled in this workshop")
     
-    # Remover aluno da oficina
-    workshop.students = [student for student in workshop.students if student.id != current_user.id]
-    db.commit()
-    
     return {"message": "Successfully unenrolled from workshop"}
 
-@app.get("/users/me/enrollments", response_model=List[schemas.Workshop])
+@router.put("/sessions/{session_id}/attendance", response_model=schemas.AttendanceBulkResult)
+def record_session_attendance(
+    session_id: int,
+    attendance_update: schemas.AttendanceBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Registra a chamada completa de uma aula em uma única requisição"""
+    db_session = attendance.get_session(db, session_id)
+    if not db_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    professor_id = db.query(models.Workshop.professor_id).filter(
+        models.Workshop.id == db_session.workshop_id
+    ).scalar()
+    if professor_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    try:
+        recorded = attendance.record_attendance(db, db_session, attendance_update.records)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": session_id, "recorded": recorded}
+
+
+@router.get("/workshops/{workshop_id}/attendance-summary", response_model=List[schemas.AttendanceSummary])
+def get_workshop_attendance_summary(
+    workshop_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Presenças e taxa de presença de cada aluno da oficina, lidas da tabela de resumo"""
+    professor_id = db.query(models.Workshop.professor_id).filter(models.Workshop.id == workshop_id).first()
+    if professor_id is None:
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    if professor_id[0] != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    return attendance.get_workshop_summary(db, workshop_id)
+
+
+def enrolled_workshops_loader(fields):
+    loader = selectinload(models.User.workshops_enrolled)
+    if fields is None:
+        return loader
+    # is_published é usado para filtrar as inscrições do próprio aluno
+    return loader.load_only(*columns_for(models.Workshop, fields + ("is_published",)))
+
+
+@router.get("/users/me/enrollments", response_model=List[schemas.Workshop])
 def get_my_enrollments(
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Retorna todas as oficinas em que o usuário atual está inscrito"""
     if current_user.role != "aluno":
         raise HTTPException(status_code=403, detail="Only students can view enrollments")
+    selected = selected_fields(fields, schemas.Workshop)
     
     # Buscar o usuário com as relações carregadas
     db_user = db.query(models.User).options(
-        selectinload(models.User.workshops_enrolled)
+        enrolled_workshops_loader(selected)
     ).filter(models.User.id == current_user.id).first()
     
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    print(f"Usuário {db_user.id} está inscrito em {len(db_user.workshops_enrolled)} oficinas")
+    logger.debug("enrollments_listed user_id=%s count=%d", db_user.id, len(db_user.workshops_enrolled))
     
     # Retorna apenas oficinas publicadas
     enrolled_workshops = [workshop for workshop in db_user.workshops_enrolled if workshop.is_published]
     
-    return enrolled_workshops
+    return fields_or_full(enrolled_workshops, schemas.Workshop, selected)
 
-@app.get("/users/me/enrollments-direct")
+@router.get("/users/me/enrollments-direct")
 def get_my_enrollments_direct(
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Método alternativo usando query direta na tabela workshop_enrollments"""
+    selected = selected_fields(fields, schemas.Workshop)
     
     # Query direta na tabela de associação
-    enrollment_query = db.query(models.Workshop).join(
+    enrollment_query = with_fields(db.query(models.Workshop), models.Workshop, selected).join(
         models.workshop_enrollments,
         models.Workshop.id == models.workshop_enrollments.c.workshop_id
     ).filter(
@@ -244,55 +511,59 @@ def get_my_enrollments_direct(
     )
     
     workshops = enrollment_query.all()
-    print(f"Query direta: usuário {current_user.id} está em {len(workshops)} oficinas")
+    logger.debug("enrollments_listed_direct user_id=%s count=%d", current_user.id, len(workshops))
     
-    return workshops
+    return fields_or_full(workshops, schemas.Workshop, selected)
 
 
-@app.get("/debug/enrollments")
-def debug_enrollments(db: Session = Depends(get_db)):
-    """Endpoint de debug para ver todas as inscrições"""
-    from sqlalchemy import text
-    
-    # Ver todas as inscrições na tabela workshop_enrollments
-    result = db.execute(text("SELECT * FROM workshop_enrollments"))
-    enrollments = []
-    for row in result:
-        enrollments.append({
-            'user_id': row[0],
-            'workshop_id': row[1]
-        })
-    
-    # Ver todos os usuários
-    users = db.query(models.User).all()
-    user_list = [{'id': u.id, 'name': u.name, 'email': u.email, 'role': u.role} for u in users]
-    
-    # Ver todas as oficinas
-    workshops = db.query(models.Workshop).all()
-    workshop_list = [{'id': w.id, 'title': w.title, 'professor_id': w.professor_id} for w in workshops]
-    
-    return {
-        'enrollments': enrollments,
-        'users': user_list,
-        'workshops': workshop_list
-    }
+@router.get("/admin/export/enrollments")
+def export_enrollments(
+    format: str = "ndjson",
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Exporta todas as inscrições em streaming (NDJSON ou CSV), com memória constante"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    if format == "ndjson":
+        return StreamingResponse(export.iter_enrollments_ndjson(), media_type="application/x-ndjson")
+    if format == "csv":
+        return StreamingResponse(
+            export.iter_enrollments_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="enrollments.csv"'}
+        )
+    raise HTTPException(status_code=400, detail="Unsupported export format, use ndjson or csv")
 
     # Get all users
-@app.get("/users/", response_model=List[schemas.User])
+@router.get("/users/", response_model=List[schemas.User])
 def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    selected = selected_fields(fields, schemas.User)
     
-    users = users_crud.get_users(db, skip=skip, limit=limit)
-    return users
+    if cursor is None:
+        users = users_crud.get_users(db, skip=skip, limit=limit, fields=selected)
+        return fields_or_full(users, schemas.User, selected, response)
+
+    try:
+        users, next_cursor = users_crud.get_users_page(db, cursor=cursor, limit=limit, fields=selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return fields_or_full(users, schemas.User, selected, response)
 
 # Update user
-@app.put("/users/{user_id}", response_model=schemas.User)
+@router.put("/users/{user_id}", response_model=schemas.User)
 def update_user(
     user_id: int,
     user_update: schemas.UserUpdate,
@@ -310,7 +581,7 @@ def update_user(
     return updated_user
 
 # Delete user
-@app.delete("/users/{user_id}")
+@router.delete("/users/{user_id}")
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
@@ -329,18 +600,20 @@ def delete_user(
     return {"message": "User deleted successfully"}
 
 # Get student enrollments
-@app.get("/users/{user_id}/enrollments", response_model=List[schemas.Workshop])
+@router.get("/users/{user_id}/enrollments", response_model=List[schemas.Workshop])
 def get_student_enrollments(
     user_id: int,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    selected = selected_fields(fields, schemas.Workshop)
     
     # Buscar usuário com suas inscrições
     db_user = db.query(models.User).options(
-        selectinload(models.User.workshops_enrolled)
+        enrolled_workshops_loader(selected)
     ).filter(models.User.id == user_id).first()
     
     if not db_user:
@@ -349,24 +622,73 @@ def get_student_enrollments(
     if db_user.role != "aluno":
         raise HTTPException(status_code=400, detail="User is not a student")
     
-    return db_user.workshops_enrolled
+    return fields_or_full(db_user.workshops_enrolled, schemas.Workshop, selected)
 
 
 # Get students only
-@app.get("/users/students/", response_model=List[schemas.User])
+@router.get("/users/students/", response_model=List[schemas.User])
 def get_students(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    selected = selected_fields(fields, schemas.User)
     
-    students = users_crud.get_users_by_role(db, role="aluno", skip=skip, limit=limit)
-    return students
-    
+    if cursor is None:
+        students = users_crud.get_users_by_role(db, role="aluno", skip=skip, limit=limit, fields=selected)
+        return fields_or_full(students, schemas.User, selected, response)
+
+    try:
+        students, next_cursor = users_crud.get_users_page(
+            db, cursor=cursor, limit=limit, role="aluno", fields=selected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return fields_or_full(students, schemas.User, selected, response)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Conexão e schema só na subida do servidor, nunca no import do módulo
+    engine = database.init_engine()
+    if DB_CREATE_ALL:
+        await run_in_threadpool(models.Base.metadata.create_all, bind=engine)
+    yield
+    await database.dispose_engines()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="ELLP Oficinas API", version="1.0.0", lifespan=lifespan)
+
+    # CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, SQL_COUNT_HEADER, SQL_TIME_HEADER],
+    )
+    # MetricsMiddleware fica dentro do QueryStatsMiddleware para ler o tempo de banco da requisição
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    app.include_router(router)
+    return app
+
+
+app = create_app()
+
 if __name__ == "__main__":
-    import uvicorn
+    from .serve import serve
 
-    uvicorn.run(app, host="0.0.0.0", port=8145)
\ No newline at end of file
+    serve()
\ No newline at end of file
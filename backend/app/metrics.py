@@ -0,0 +1,165 @@
+"""Métricas HTTP no formato texto do Prometheus.
+
+Todas as atualizações acontecem no event loop (o middleware é ASGI puro e não
+cede o controle entre ler e gravar um contador), então os contadores não
+precisam de lock: só uma corrotina mexe neles por vez, e o custo por
+requisição é de algumas somas em dicionários.
+"""
+import time
+from collections import defaultdict
+
+from fastapi import Response
+
+from .query_stats import current_stats
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RouteMetrics:
+    __slots__ = ("bucket_counts", "count", "duration_sum", "errors", "db_seconds", "db_queries")
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.errors = 0
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+    def observe(self, duration: float, failed: bool, db_seconds: float, db_queries: int):
+        index = 0
+        while index < len(LATENCY_BUCKETS) and duration > LATENCY_BUCKETS[index]:
+            index += 1
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.duration_sum += duration
+        self.db_seconds += db_seconds
+        self.db_queries += db_queries
+        if failed:
+            self.errors += 1
+
+    def quantile(self, q: float):
+        """Estimativa a partir do histograma, interpolando dentro do bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+            if bucket_count and cumulative + bucket_count >= target:
+                return lower + (upper - lower) * (target - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = upper
+        return LATENCY_BUCKETS[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = defaultdict(RouteMetrics)
+        self.responses = defaultdict(int)
+        self.in_flight = 0
+        # Funções que devolvem linhas extras (ex.: cache de usuários do auth)
+        self.collectors = []
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests served, by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        routes = sorted(self.routes.items())
+        lines += [
+            "# HELP http_request_duration_seconds Request latency.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), metrics in routes:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, metrics.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {metrics.duration_sum:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+
+        lines += [
+            "# HELP http_request_duration_quantile_seconds Latency percentiles estimated from the histogram.",
+            "# TYPE http_request_duration_quantile_seconds gauge",
+        ]
+        for (method, route), metrics in routes:
+            for q in QUANTILES:
+                lines.append(
+                    f'http_request_duration_quantile_seconds{{method="{method}",route="{route}",quantile="{q}"}} '
+                    f"{metrics.quantile(q):.6f}"
+                )
+
+        for name, help_text, attribute in (
+            ("http_request_errors_total", "Requests that failed with a 5xx or an exception.", "errors"),
+            ("http_request_db_seconds_total", "Time spent in SQL statements.", "db_seconds"),
+            ("http_request_db_queries_total", "SQL statements executed.", "db_queries"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), metrics in routes:
+                value = getattr(metrics, attribute)
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f'{name}{{method="{method}",route="{route}"}} {value}')
+
+        for collector in self.collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            registry.in_flight -= 1
+            status = status_holder[0]
+            # Usa o template da rota (/workshops/{workshop_id}) para não explodir a cardinalidade
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            stats = current_stats()
+            registry.responses[(method, route, status)] += 1
+            registry.routes[(method, route)].observe(
+                duration,
+                failed or status >= 500,
+                stats.total_seconds if stats else 0.0,
+                stats.count if stats else 0,
+            )
+
+
+def metrics_response() -> Response:
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
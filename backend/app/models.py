@@ -1,18 +1,38 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from .database import Base
 
 workshop_enrollments = Table(
     'workshop_enrollments',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id')),
-    Column('workshop_id', Integer, ForeignKey('workshops.id'))
+    Column('workshop_id', Integer, ForeignKey('workshops.id')),
+    UniqueConstraint('workshop_id', 'user_id', name='uq_workshop_enrollments_workshop_user'),
+    Index('ix_workshop_enrollments_user_id', 'user_id')
+)
+
+# Fila de espera das oficinas lotadas: a ordem de chegada é dada pelo id
+workshop_waitlist = Table(
+    'workshop_waitlist',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('workshop_id', Integer, ForeignKey('workshops.id', ondelete='CASCADE'), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('created_at', DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint('workshop_id', 'user_id', name='uq_workshop_waitlist_workshop_user'),
+    Index('ix_workshop_waitlist_workshop_id_id', 'workshop_id', 'id'),
+    Index('ix_workshop_waitlist_user_id', 'user_id')
 )
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Chave da paginação por cursor
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -28,18 +48,31 @@ class User(Base):
 
 class Workshop(Base):
     __tablename__ = "workshops"
+    __table_args__ = (
+        Index("ix_workshops_created_at_id", "created_at", "id"),
+        # Combinações mais comuns dos filtros da listagem
+        Index("ix_workshops_published_theme_start", "is_published", "theme", "start_date"),
+        Index("ix_workshops_published_start", "is_published", "start_date"),
+        Index("ix_workshops_professor_start", "professor_id", "start_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text)
     theme = Column(String(255))
     max_students = Column(Integer, default=20)
+    # Contador de inscritos mantido pelo enroll/unenroll (evita carregar a lista de alunos)
+    enrolled_count = Column(Integer, nullable=False, default=0, server_default="0")
     prerequisites = Column(Text)
-    is_published = Column(Boolean, default=True)
+    is_published = Column(Boolean, default=True, index=True)
     is_completed = Column(Boolean, default=False)
-    professor_id = Column(Integer, ForeignKey("users.id"))
+    professor_id = Column(Integer, ForeignKey("users.id"), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Incrementada em todo UPDATE (ORM ou Core) da oficina; base do ETag, já que o
+    # updated_at do SQLite só tem resolução de segundos
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version + 1"))
 
     start_date = Column(DateTime(timezone=True))
     end_date = Column(DateTime(timezone=True))
@@ -49,12 +82,19 @@ class Workshop(Base):
     students = relationship("User", secondary=workshop_enrollments, back_populates="workshops_enrolled")
     sessions = relationship("Session", back_populates="workshop")
 
+    @property
+    def available_spots(self):
+        # Calculado a partir do contador, sem consulta extra por oficina
+        if self.max_students is None:
+            return None
+        return max(self.max_students - (self.enrolled_count or 0), 0)
+
 
 class Session(Base):
     __tablename__ = "sessions"
 
     id = Column(Integer, primary_key=True, index=True)
-    workshop_id = Column(Integer, ForeignKey("workshops.id"))
+    workshop_id = Column(Integer, ForeignKey("workshops.id"), index=True)
     session_date = Column(DateTime(timezone=True))
     description = Column(String(255))
 
@@ -64,10 +104,32 @@ class Session(Base):
 
 class Attendance(Base):
     __tablename__ = "attendances"
+    __table_args__ = (
+        # Uma presença por aluno e aula; também é o alvo do upsert em lote e
+        # serve às buscas por session_id
+        UniqueConstraint("session_id", "student_id", name="uq_attendances_session_student"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sessions.id"))
-    student_id = Column(Integer, ForeignKey("users.id"))
+    student_id = Column(Integer, ForeignKey("users.id"), index=True)
     is_present = Column(Boolean, default=False)
 
-    session = relationship("Session", back_populates="attendances")
\ No newline at end of file
+    session = relationship("Session", back_populates="attendances")
+
+
+class AttendanceSummary(Base):
+    """Contadores de presença por aluno e oficina, mantidos junto com cada chamada"""
+    __tablename__ = "attendance_summaries"
+    __table_args__ = (
+        Index("ix_attendance_summaries_student_id", "student_id"),
+    )
+
+    workshop_id = Column(Integer, ForeignKey("workshops.id", ondelete="CASCADE"), primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    present_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    @property
+    def attendance_rate(self):
+        return round(self.present_count / self.total_count, 4) if self.total_count else None
@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+def encode_cursor(created_at, id_):
+    """Gera o cursor opaco a partir da chave (created_at, id) do último item"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, id_])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, id_ = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(id_)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def order_by_key(query, model):
+    return query.order_by(model.created_at, model.id)
+
+
+def keyset_page(query, model, cursor: str = None, limit: int = 100):
+    """Pagina por (created_at, id) sem OFFSET: o índice leva direto ao próximo item.
+
+    Um cursor vazio pede a primeira página. Retorna (itens, next_cursor), com
+    next_cursor None na última página.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        column, value = model.created_at, created_at
+        if query.session.get_bind().dialect.name == "sqlite":
+            # SQLite compara datas como texto e o CURRENT_TIMESTAMP não grava frações de segundo
+            column = func.strftime(SQLITE_TIMESTAMP_FORMAT, column)
+            value = func.strftime(SQLITE_TIMESTAMP_FORMAT, value)
+        query = query.filter(or_(
+            column > value,
+            and_(column == value, model.id > last_id)
+        ))
+    items = order_by_key(query, model).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Checkouts mais lentos que isso geram um warning no log
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+
+
+class CheckoutStats:
+    """Tempo de espera por conexão acumulado desde a criação do pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait_seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            if wait_seconds > self.max_wait_seconds:
+                self.max_wait_seconds = wait_seconds
+            if wait_seconds * 1000 >= DB_POOL_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Mede quanto cada checkout esperou por uma conexão livre"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.checkout_stats.record_timeout()
+            logger.warning("Connection pool checkout failed: %s", self.status())
+            raise
+        wait = time.perf_counter() - started
+        self.checkout_stats.record(wait)
+        if wait * 1000 >= DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning("Slow connection pool checkout: waited %.1f ms (%s)", wait * 1000, self.status())
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    # Mantém o logger do SQLAlchemy (sqlalchemy.pool.impl.*), que fica em WARNING por
+    # padrão; sem isso o nome seria app.pool.* e herdaria o nível INFO do root
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Parâmetros de pool para create_engine/create_async_engine"""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # SQLite em memória usa um pool próprio de conexão única
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_status(engine) -> dict:
+    if engine is None:
+        return None
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    stats = getattr(pool, "checkout_stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Em modo debug cada resposta traz a contagem e o tempo das queries nos headers
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").lower() in ("1", "true", "yes")
+# Mesma query repetida mais vezes que isso em uma requisição indica N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+
+SQL_COUNT_HEADER = "X-SQL-Count"
+SQL_TIME_HEADER = "X-SQL-Time-ms"
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_seconds += elapsed
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        return [(statement, times) for statement, times in self.statements.most_common() if times > threshold]
+
+
+_request_stats: ContextVar = ContextVar("request_query_stats", default=None)
+# Capturas globais (testes): recebem as queries de todas as threads
+_captures = []
+_captures_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, elapsed)
+
+
+def current_stats():
+    return _request_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """Conta as queries executadas no contexto atual (requisição ou tarefa)"""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def capture_queries():
+    """Conta as queries de qualquer thread enquanto o bloco estiver ativo.
+
+    Útil com o TestClient, que executa a aplicação em outra thread.
+    """
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI que mede as queries de cada requisição e avisa sobre N+1"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and SQL_DEBUG_HEADERS:
+                    headers = list(message.get("headers", []))
+                    headers.append((SQL_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                    headers.append((SQL_TIME_HEADER.lower().encode(), f"{stats.total_seconds * 1000:.2f}".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                for statement, times in stats.repeated_statements():
+                    logger.warning(
+                        "Possible N+1 on %s %s: statement executed %d times: %s",
+                        scope["method"], scope["path"], times, statement
+                    )
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+import time
+
+from fastapi import Request
+
+from . import database
+
+# Depois de uma escrita, o mesmo usuário lê do primário por esse tempo (atraso da réplica)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_MAX_CLIENTS = int(os.getenv("READ_YOUR_WRITES_MAX_CLIENTS", "10000"))
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# POSTs que não alteram dados visíveis ao cliente
+READ_ONLY_PATHS = {"/batch", "/token"}
+
+
+def client_key(authorization: str):
+    """Identifica o cliente pelo hash do token, sem guardar o token em memória"""
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+class RecentWriters:
+    """Clientes que escreveram há pouco, com expiração. Vale só para este processo."""
+
+    def __init__(self, window_seconds: float, max_clients: int):
+        self.window_seconds = window_seconds
+        self.max_clients = max_clients
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str):
+        if key is None or self.window_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.max_clients:
+                self._until = {k: until for k, until in self._until.items() if until > now}
+            self._until[key] = now + self.window_seconds
+
+    def is_recent(self, key: str) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            until = self._until.get(key)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._until[key]
+                return False
+            return True
+
+
+recent_writers = RecentWriters(READ_YOUR_WRITES_SECONDS, READ_YOUR_WRITES_MAX_CLIENTS)
+
+
+def get_read_db(request: Request):
+    """Sessão para endpoints só de leitura: réplica, exceto logo após uma escrita do mesmo cliente"""
+    if recent_writers.is_recent(client_key(request.headers.get("Authorization"))):
+        db = database.SessionLocal()
+    else:
+        db = database.read_only_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Marca o cliente como escritor recente quando uma escrita é respondida com sucesso"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or scope["path"] in READ_ONLY_PATHS
+            or database.replica_engine is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking_writer(message):
+            # Marca antes de a resposta sair: a próxima leitura do cliente já vai ao primário
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = dict(scope["headers"])
+                recent_writers.mark(client_key(headers.get(b"authorization", b"").decode("latin-1")))
+            await send(message)
+
+        await self.app(scope, receive, send_marking_writer)
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
+
+from .batch import BATCH_MAX_REQUESTS, validate_path as validate_batch_path
 
 
 # User Schemas
@@ -31,6 +33,18 @@ class User(UserBase):
         from_attributes = True
 
 
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class UserImportResult(BaseModel):
+    created: int
+    error_count: int
+    errors: List[UserImportError]
+
+
 # Workshop Schemas
 class WorkshopBase(BaseModel):
     title: str
@@ -72,6 +86,85 @@ class Workshop(WorkshopBase):
         from_attributes = True
 
 
+class WaitlistPosition(BaseModel):
+    workshop_id: int
+    position: int
+
+
+class WorkshopFilters(BaseModel):
+    theme: Optional[str] = None
+    professor_id: Optional[int] = None
+    starts_after: Optional[datetime] = None
+    starts_before: Optional[datetime] = None
+    has_free_seats: Optional[bool] = None
+    is_completed: Optional[bool] = None
+
+
+class ThemeFacet(BaseModel):
+    theme: Optional[str] = None
+    count: int
+
+
+class WorkshopFacets(BaseModel):
+    total: int
+    open: int
+    full: int
+    themes: List[ThemeFacet]
+
+
+# Batch Schemas
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    method: Literal["GET"] = "GET"
+    path: str
+
+    @field_validator("path")
+    @classmethod
+    def check_path(cls, value):
+        return validate_batch_path(value)
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1, max_length=BATCH_MAX_REQUESTS)
+
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
+
+
+# Attendance Schemas
+class AttendanceRecord(BaseModel):
+    student_id: int
+    is_present: bool
+
+
+class AttendanceBulkUpdate(BaseModel):
+    records: List[AttendanceRecord]
+
+
+class AttendanceBulkResult(BaseModel):
+    session_id: int
+    recorded: int
+
+
+class AttendanceSummary(BaseModel):
+    student_id: int
+    student_name: Optional[str] = None
+    present_count: int
+    total_count: int
+    attendance_rate: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Auth Schemas - CORRIGIDO
 class Token(BaseModel):
     access_token: str
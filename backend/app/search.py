@@ -0,0 +1,95 @@
+"""Busca textual de oficinas.
+
+No PostgreSQL usa a coluna gerada workshops.search_vector (tsvector) com
+índice GIN; no SQLite, a tabela virtual FTS5 workshops_fts mantida por
+triggers. Em ambos o índice acompanha inserts e updates sem código na
+aplicação. Os mesmos comandos estão na migração 0004.
+"""
+import re
+
+from sqlalchemy import DDL, event, func, literal_column, or_, text, Float, Integer
+
+from . import models
+
+# Configuração de idioma do to_tsvector; precisa ser constante na coluna gerada
+SEARCH_CONFIG = "portuguese"
+
+POSTGRES_DDL = [
+    f"""ALTER TABLE workshops ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(theme, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(prerequisites, '')), 'D')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_workshops_search_vector ON workshops USING gin (search_vector)",
+]
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS workshops_fts USING fts5(
+        title, description, theme, prerequisites,
+        content='workshops', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS workshops_fts_insert AFTER INSERT ON workshops BEGIN
+        INSERT INTO workshops_fts(rowid, title, description, theme, prerequisites)
+        VALUES (new.id, new.title, new.description, new.theme, new.prerequisites);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS workshops_fts_delete AFTER DELETE ON workshops BEGIN
+        INSERT INTO workshops_fts(workshops_fts, rowid, title, description, theme, prerequisites)
+        VALUES ('delete', old.id, old.title, old.description, old.theme, old.prerequisites);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS workshops_fts_update
+    AFTER UPDATE OF title, description, theme, prerequisites ON workshops BEGIN
+        INSERT INTO workshops_fts(workshops_fts, rowid, title, description, theme, prerequisites)
+        VALUES ('delete', old.id, old.title, old.description, old.theme, old.prerequisites);
+        INSERT INTO workshops_fts(rowid, title, description, theme, prerequisites)
+        VALUES (new.id, new.title, new.description, new.theme, new.prerequisites);
+    END""",
+]
+
+# Pesos do bm25 na ordem das colunas do FTS5: title, description, theme, prerequisites
+SQLITE_BM25_WEIGHTS = "10.0, 2.0, 5.0, 1.0"
+
+for statement in POSTGRES_DDL:
+    event.listen(models.Workshop.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DDL:
+    event.listen(models.Workshop.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def _fts5_query(q: str):
+    # Cada palavra vira um termo entre aspas com prefixo, evitando erros de sintaxe do FTS5
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_query(db, q: str):
+    """Query de oficinas que casam com `q`, já ordenada por relevância"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        search_vector = literal_column("workshops.search_vector")
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        return db.query(models.Workshop).filter(search_vector.op("@@")(ts_query)).order_by(
+            func.ts_rank_cd(search_vector, ts_query).desc(), models.Workshop.id
+        )
+
+    if dialect == "sqlite":
+        match = _fts5_query(q)
+        if not match:
+            return None
+        ranked = text(
+            f"SELECT rowid AS id, bm25(workshops_fts, {SQLITE_BM25_WEIGHTS}) AS rank "
+            "FROM workshops_fts WHERE workshops_fts MATCH :match"
+        ).bindparams(match=match).columns(id=Integer, rank=Float).subquery()
+        return db.query(models.Workshop).join(ranked, ranked.c.id == models.Workshop.id).order_by(
+            ranked.c.rank, models.Workshop.id
+        )
+
+    # Outros bancos: sem índice textual, busca simples por substring
+    pattern = f"%{q}%"
+    return db.query(models.Workshop).filter(or_(
+        models.Workshop.title.ilike(pattern),
+        models.Workshop.description.ilike(pattern),
+        models.Workshop.theme.ilike(pattern),
+        models.Workshop.prerequisites.ilike(pattern),
+    )).order_by(models.Workshop.id)
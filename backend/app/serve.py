@@ -0,0 +1,116 @@
+"""Ponto de entrada de produção: vários processos worker servindo app.main:app.
+
+Uso (dentro de backend/):
+    python -m app.serve --workers 4 --port 8145
+
+Com gunicorn instalado usa gunicorn + UvicornWorker (preload, reciclagem de workers,
+desligamento gracioso). Sem ele (ex.: Windows) cai para os workers do próprio uvicorn.
+"""
+import argparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "app.main:app"
+
+SERVER_HOST = os.getenv("HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("PORT", "8145"))
+# Reciclar workers limita o efeito de vazamentos de memória; o jitter evita que todos
+# reiniciem ao mesmo tempo
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+# Tempo para terminar as requisições em andamento ao desligar ou reciclar um worker
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "60"))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+
+
+def available_cores() -> int:
+    """Núcleos que este processo pode usar (respeita taskset/cgroups via afinidade)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    # Cada worker já tem event loop e threadpool próprios: um processo por núcleo basta
+    return int(os.getenv("WEB_CONCURRENCY", str(available_cores())))
+
+
+def post_fork(server, worker):
+    """Nenhuma conexão do processo mestre pode ser reaproveitada pelo worker"""
+    from . import database
+
+    for engine in (database.engine, database.replica_engine):
+        if engine is not None:
+            engine.dispose(close=False)
+
+
+def gunicorn_options(host: str, port: int, workers: int) -> dict:
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        # Importa a aplicação uma vez no mestre: workers sobem mais rápido e compartilham
+        # as páginas de código (copy-on-write). Engines só nascem no lifespan de cada worker.
+        "preload_app": True,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "timeout": SERVER_TIMEOUT,
+        "keepalive": SERVER_KEEPALIVE,
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }
+
+
+def _run_gunicorn(options: dict):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from .main import app
+
+            return app
+
+    Application().run()
+
+
+def _run_uvicorn(host: str, port: int, workers: int):
+    import uvicorn
+
+    options = {"host": host, "port": port, "workers": workers,
+               "timeout_graceful_shutdown": SERVER_GRACEFUL_TIMEOUT, "timeout_keep_alive": SERVER_KEEPALIVE}
+    # Sem gunicorn não há quem reponha um processo encerrado: limit_max_requests
+    # derrubaria o servidor de vez, então aqui não há reciclagem
+    logger.warning("gunicorn not installed: running %d uvicorn worker(s) without max-requests recycling", workers)
+    uvicorn.run(APP_PATH, **options)
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, workers: int = None):
+    workers = workers or default_workers()
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        _run_uvicorn(host, port, workers)
+        return
+    _run_gunicorn(gunicorn_options(host, port, workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="padrão: WEB_CONCURRENCY ou núcleos disponíveis")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
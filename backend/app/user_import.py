@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .auth import hash_passwords
+
+USER_IMPORT_CHUNK_SIZE = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "500"))
+# Limita os erros devolvidos para a resposta não crescer com o arquivo
+USER_IMPORT_MAX_ERRORS = int(os.getenv("USER_IMPORT_MAX_ERRORS", "1000"))
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str, explicit: str = None):
+    if explicit:
+        fmt = explicit.lower()
+    else:
+        extension = (filename or "").rsplit(".", 1)[-1].lower()
+        fmt = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}.get(extension)
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError("Unsupported import format, use csv or ndjson")
+    return fmt
+
+
+def iter_records(text_stream, fmt: str):
+    """Lê o arquivo linha a linha, gerando (número da linha, dict ou mensagem de erro)"""
+    if fmt == "csv":
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            # Colunas excedentes ficam sob a chave None no DictReader
+            yield reader.line_num, {key: value for key, value in row.items() if key is not None}
+        return
+
+    for line_number, line in enumerate(text_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, "Invalid JSON"
+            continue
+        yield line_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row: int, error: str, email: str = None):
+        self.error_count += 1
+        if len(self.errors) < USER_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "email": email, "error": error})
+
+    def as_dict(self):
+        errors = sorted(self.errors, key=lambda error: error["row"])
+        return {"created": self.created, "error_count": self.error_count, "errors": errors}
+
+
+def _existing_emails(db: Session, emails):
+    return {email for (email,) in db.query(models.User.email).filter(models.User.email.in_(emails))}
+
+
+def _import_chunk(db: Session, chunk, result: ImportResult):
+    candidates = {}
+    for row, record in chunk:
+        if isinstance(record, str):
+            result.add_error(row, record)
+            continue
+        try:
+            user = schemas.UserCreate(**record)
+        except ValidationError as e:
+            result.add_error(row, "; ".join(error["msg"] for error in e.errors()), record.get("email"))
+            continue
+        if user.email in candidates:
+            result.add_error(row, "Duplicate email in file", user.email)
+            continue
+        candidates[user.email] = (row, user)
+
+    if not candidates:
+        return
+
+    # Uma consulta por bloco para descobrir emails já cadastrados
+    for email in _existing_emails(db, candidates.keys()):
+        row, _ = candidates.pop(email)
+        result.add_error(row, "Email already registered", email)
+
+    if not candidates:
+        return
+
+    users = [user for _, user in candidates.values()]
+    password_hashes = hash_passwords(user.password for user in users)
+    rows = [
+        {
+            "email": user.email,
+            "name": user.name,
+            "password_hash": password_hash,
+            "role": user.role,
+            "is_active": True,
+        }
+        for user, password_hash in zip(users, password_hashes)
+    ]
+
+    inserted = _insert_new_users(db, rows)
+    db.commit()
+    # Outro processo cadastrou algum desses emails entre a consulta e o insert: só
+    # essas linhas falham, as demais do bloco foram gravadas
+    for row, user in candidates.values():
+        if user.email not in inserted:
+            result.add_error(row, "Email already registered", user.email)
+    result.created += len(inserted)
+
+
+def _insert_new_users(db: Session, rows):
+    """INSERT em lote que ignora emails já cadastrados; retorna os emails inseridos"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            dialect_insert(models.User)
+            .on_conflict_do_nothing(index_elements=[models.User.email])
+            .returning(models.User.email)
+        )
+        return set(db.execute(stmt, rows).scalars())
+
+    # Bancos sem ON CONFLICT: tenta o lote e, se algum email colidir, insere linha a linha
+    try:
+        with db.begin_nested():
+            db.execute(insert(models.User), rows)
+        return {row["email"] for row in rows}
+    except IntegrityError:
+        pass
+    inserted = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.User), [row])
+            inserted.add(row["email"])
+        except IntegrityError:
+            continue
+    return inserted
+
+
+def import_users(db: Session, fileobj, fmt: str, chunk_size: int = USER_IMPORT_CHUNK_SIZE):
+    """Importa usuários de um CSV/NDJSON em blocos, com memória constante.
+
+    Cada bloco faz uma consulta de emails existentes e um único INSERT em lote.
+    """
+    text_stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    result = ImportResult()
+    try:
+        records = iter_records(text_stream, fmt)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(db, chunk, result)
+    except UnicodeDecodeError:
+        result.add_error(0, "File is not valid UTF-8")
+    finally:
+        # Devolve o arquivo ao chamador sem fechá-lo
+        text_stream.detach()
+    return result.as_dict()
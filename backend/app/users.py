@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 
-from . import models, schemas
-from .auth import get_password_hash, get_user_by_email
+from . import models, schemas, workshops
+from .auth import get_password_hash_pooled, get_user_by_email, invalidate_principal
+from .events import publish_workshop_change
 
 
 def get_user(db: Session, user_id: int):
@@ -17,7 +18,7 @@ def create_user(db: Session, user: schemas.UserCreate):
     if db_user:
         raise ValueError("Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = get_password_hash_pooled(user.password)
     db_user = models.User(
         email=user.email,
         name=user.name,
@@ -35,11 +36,13 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
     if not db_user:
         return None
 
+    previous_email = db_user.email
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_user, field, value)
 
     db.commit()
+    invalidate_principal(previous_email, db_user.email)
     db.refresh(db_user)
     return db_user
 
@@ -49,6 +52,11 @@ def delete_user(db: Session, user_id: int):
     if not db_user:
         return False
 
+    email = db_user.email
+    # As vagas do aluno voltam para a oficina (ou para o primeiro da fila)
+    released = workshops.release_student_seats(db, user_id)
     db.delete(db_user)
     db.commit()
+    invalidate_principal(email)
+    publish_workshop_change(*released)
     return True
@@ -1,8 +1,14 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 import app.models as models
 import app.schemas as schemas
-from .auth import get_password_hash, verify_password
+from . import workshops
+from . import auth
+from .auth import get_password_hash_async, get_password_hash_pooled, invalidate_principal, verify_password
+from .events import publish_workshop_change
+from .fieldsets import with_fields
+from .pagination import keyset_page, order_by_key
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -10,11 +16,19 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, fields: tuple = None):
+    query = with_fields(db.query(models.User), models.User, fields)
+    return order_by_key(query, models.User).offset(skip).limit(limit).all()
 
-def get_users_by_role(db: Session, role: str, skip: int = 0, limit: int = 100):
-    return db.query(models.User).filter(models.User.role == role).offset(skip).limit(limit).all()
+def get_users_by_role(db: Session, role: str, skip: int = 0, limit: int = 100, fields: tuple = None):
+    query = with_fields(db.query(models.User), models.User, fields).filter(models.User.role == role)
+    return order_by_key(query, models.User).offset(skip).limit(limit).all()
+
+def get_users_page(db: Session, cursor: str = None, limit: int = 100, role: str = None, fields: tuple = None):
+    query = with_fields(db.query(models.User), models.User, fields)
+    if role:
+        query = query.filter(models.User.role == role)
+    return keyset_page(query, models.User, cursor=cursor, limit=limit)
 
 def create_user(db: Session, user: schemas.UserCreate):
     # Verificar se usuário já existe
@@ -22,7 +36,7 @@ def create_user(db: Session, user: schemas.UserCreate):
     if db_user:
         raise ValueError("Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = get_password_hash_pooled(user.password)
     db_user = models.User(
         email=user.email,
         name=user.name,
@@ -39,17 +53,19 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
     if not db_user:
         return None
     
+    previous_email = db_user.email
     update_data = user_update.dict(exclude_unset=True)
     
     # Se está atualizando a senha, fazer hash
     if 'password' in update_data and update_data['password']:
-        update_data['password_hash'] = get_password_hash(update_data['password'])
+        update_data['password_hash'] = get_password_hash_pooled(update_data['password'])
         del update_data['password']
     
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     db.commit()
+    invalidate_principal(previous_email, db_user.email)
     db.refresh(db_user)
     return db_user
 
@@ -58,8 +74,13 @@ def delete_user(db: Session, user_id: int):
     if not db_user:
         return False
     
+    email = db_user.email
+    # As vagas do aluno voltam para a oficina (ou para o primeiro da fila)
+    released = workshops.release_student_seats(db, user_id)
     db.delete(db_user)
     db.commit()
+    invalidate_principal(email)
+    publish_workshop_change(*released)
     return True
 
 def authenticate_user(db: Session, email: str, password: str):
@@ -75,8 +96,9 @@ def change_user_password(db: Session, user_id: int, new_password: str):
     if not db_user:
         return False
     
-    db_user.password_hash = get_password_hash(new_password)
+    db_user.password_hash = get_password_hash_pooled(new_password)
     db.commit()
+    invalidate_principal(db_user.email)
     return True
 
 def deactivate_user(db: Session, user_id: int):
@@ -86,6 +108,7 @@ def deactivate_user(db: Session, user_id: int):
     
     db_user.is_active = False
     db.commit()
+    invalidate_principal(db_user.email)
     return True
 
 def activate_user(db: Session, user_id: int):
@@ -95,4 +118,107 @@ def activate_user(db: Session, user_id: int):
     
     db_user.is_active = True
     db.commit()
-    return True
\ No newline at end of file
+    invalidate_principal(db_user.email)
+    return True
+
+
+# Versões aguardáveis para o modo DATABASE_ASYNC: as consultas aguardam o driver
+# assíncrono e o bcrypt roda no pool de hash do auth, nunca no event loop
+async def get_user_async(db: AsyncSession, user_id: int):
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalars().first()
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    return await auth.get_user_by_email_async(db, email)
+
+async def get_users_async(db: AsyncSession, skip: int = 0, limit: int = 100, fields: tuple = None):
+    query = with_fields(select(models.User), models.User, fields)
+    result = await db.execute(order_by_key(query, models.User).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def get_users_by_role_async(db: AsyncSession, role: str, skip: int = 0, limit: int = 100,
+                                  fields: tuple = None):
+    query = with_fields(select(models.User), models.User, fields).where(models.User.role == role)
+    result = await db.execute(order_by_key(query, models.User).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def get_users_page_async(db: AsyncSession, cursor: str = None, limit: int = 100, role: str = None,
+                               fields: tuple = None):
+    # keyset_page trabalha sobre Query; run_sync a executa com o mesmo driver assíncrono
+    return await db.run_sync(get_users_page, cursor, limit, role, fields)
+
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate):
+    if await auth.get_user_by_email_async(db, user.email):
+        raise ValueError("Email already registered")
+
+    db_user = models.User(
+        email=user.email,
+        name=user.name,
+        password_hash=await get_password_hash_async(user.password),
+        role=user.role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user_async(db: AsyncSession, user_id: int, user_update: schemas.UserUpdate):
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return None
+
+    previous_email = db_user.email
+    update_data = user_update.dict(exclude_unset=True)
+    if 'password' in update_data and update_data['password']:
+        update_data['password_hash'] = await get_password_hash_async(update_data['password'])
+        del update_data['password']
+
+    for field, value in update_data.items():
+        setattr(db_user, field, value)
+
+    await db.commit()
+    invalidate_principal(previous_email, db_user.email)
+    await db.refresh(db_user)
+    return db_user
+
+async def delete_user_async(db: AsyncSession, user_id: int):
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return False
+
+    email = db_user.email
+    released = await db.run_sync(workshops.release_student_seats, user_id)
+    await db.delete(db_user)
+    await db.commit()
+    invalidate_principal(email)
+    publish_workshop_change(*released)
+    return True
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str):
+    return await auth.authenticate_user_async(db, email, password)
+
+async def change_user_password_async(db: AsyncSession, user_id: int, new_password: str):
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return False
+
+    db_user.password_hash = await get_password_hash_async(new_password)
+    await db.commit()
+    invalidate_principal(db_user.email)
+    return True
+
+async def _set_user_active_async(db: AsyncSession, user_id: int, is_active: bool):
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return False
+
+    db_user.is_active = is_active
+    await db.commit()
+    invalidate_principal(db_user.email)
+    return True
+
+async def deactivate_user_async(db: AsyncSession, user_id: int):
+    return await _set_user_active_async(db, user_id, False)
+
+async def activate_user_async(db: AsyncSession, user_id: int):
+    return await _set_user_active_async(db, user_id, True)
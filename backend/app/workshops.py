@@ -1,18 +1,105 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from . import models, schemas
+from . import models, schemas, search
+from .events import publish_workshop_change
+from .fieldsets import with_fields
+from .pagination import keyset_page, order_by_key
 
 def get_workshop(db: Session, workshop_id: int):
     return db.query(models.Workshop).filter(models.Workshop.id == workshop_id).first()
 
 
-def get_workshops(db: Session, skip: int = 0, limit: int = 100, published_only: bool = False):
-    query = db.query(models.Workshop)
+def apply_filters(query, published_only: bool = False, filters: schemas.WorkshopFilters = None):
+    if published_only:
+        query = query.filter(models.Workshop.is_published == True)
+    if filters is None:
+        return query
+    if filters.theme is not None:
+        query = query.filter(models.Workshop.theme == filters.theme)
+    if filters.professor_id is not None:
+        query = query.filter(models.Workshop.professor_id == filters.professor_id)
+    if filters.starts_after is not None:
+        query = query.filter(models.Workshop.start_date >= filters.starts_after)
+    if filters.starts_before is not None:
+        query = query.filter(models.Workshop.start_date <= filters.starts_before)
+    if filters.is_completed is not None:
+        query = query.filter(models.Workshop.is_completed == filters.is_completed)
+    if filters.has_free_seats is not None:
+        has_seats = models.Workshop.enrolled_count < models.Workshop.max_students
+        query = query.filter(has_seats if filters.has_free_seats else ~has_seats)
+    return query
+
+
+def get_workshops(db: Session, skip: int = 0, limit: int = 100, published_only: bool = False,
+                  filters: schemas.WorkshopFilters = None, fields: tuple = None):
+    query = with_fields(db.query(models.Workshop), models.Workshop, fields)
+    query = apply_filters(query, published_only, filters)
+    return order_by_key(query, models.Workshop).offset(skip).limit(limit).all()
+
+
+def get_workshops_page(db: Session, cursor: str = None, limit: int = 100, published_only: bool = False,
+                       filters: schemas.WorkshopFilters = None, fields: tuple = None):
+    query = with_fields(db.query(models.Workshop), models.Workshop, fields)
+    query = apply_filters(query, published_only, filters)
+    return keyset_page(query, models.Workshop, cursor=cursor, limit=limit)
+
+
+def get_workshop_facets(db: Session, published_only: bool = False, filters: schemas.WorkshopFilters = None):
+    """Contagens por tema e de oficinas abertas/lotadas em uma única query agregada"""
+    has_seats = models.Workshop.enrolled_count < models.Workshop.max_students
+    query = db.query(
+        models.Workshop.theme,
+        func.count(models.Workshop.id),
+        func.sum(case((has_seats, 1), else_=0))
+    )
+    rows = apply_filters(query, published_only, filters).group_by(models.Workshop.theme).all()
+
+    total = sum(count for _, count, _ in rows)
+    open_count = sum(open_ or 0 for _, _, open_ in rows)
+    return {
+        "total": total,
+        "open": open_count,
+        "full": total - open_count,
+        "themes": sorted(
+            ({"theme": theme, "count": count} for theme, count, _ in rows),
+            key=lambda facet: (-facet["count"], facet["theme"] or "")
+        ),
+    }
+
+
+def search_workshops(db: Session, q: str, skip: int = 0, limit: int = 20, published_only: bool = False):
+    query = search.search_query(db, q)
+    if query is None:
+        return []
     if published_only:
         query = query.filter(models.Workshop.is_published == True)
     return query.offset(skip).limit(limit).all()
 
 
+def get_workshop_version(db: Session, workshop_id: int):
+    """Só as colunas que mudam quando a oficina ou suas inscrições mudam"""
+    return db.query(
+        models.Workshop.id,
+        func.coalesce(models.Workshop.updated_at, models.Workshop.created_at).label("last_modified"),
+        models.Workshop.version
+    ).filter(models.Workshop.id == workshop_id).first()
+
+
+def get_workshops_version(db: Session, published_only: bool = False, filters: schemas.WorkshopFilters = None):
+    """Agregado único que muda sempre que alguma oficina da listagem muda"""
+    last_modified = func.coalesce(models.Workshop.updated_at, models.Workshop.created_at)
+    query = db.query(
+        func.count(models.Workshop.id),
+        func.max(last_modified).label("last_modified"),
+        func.coalesce(func.sum(models.Workshop.version), 0),
+        func.max(models.Workshop.id)
+    )
+    return apply_filters(query, published_only, filters).one()
+
+
 def get_user_workshops(db: Session, user_id: int):
     return db.query(models.Workshop).filter(models.Workshop.professor_id == user_id).all()
 
@@ -25,6 +112,7 @@ def create_workshop(db: Session, workshop: schemas.WorkshopCreate, professor_id:
     db.add(db_workshop)
     db.commit()
     db.refresh(db_workshop)
+    publish_workshop_change(db_workshop.id)
     return db_workshop
 
 
@@ -37,39 +125,253 @@ def update_workshop(db: Session, workshop_id: int, workshop_update: schemas.Work
     for field, value in update_data.items():
         setattr(db_workshop, field, value)
 
+    if "max_students" in update_data:
+        db.flush()
+        _fill_from_waitlist(db, workshop_id)
     db.commit()
     db.refresh(db_workshop)
+    publish_workshop_change(workshop_id)
     return db_workshop
 
 
-def delete_workshop(db: Session, workshop_id: int):
-    db_workshop = get_workshop(db, workshop_id)
-    if not db_workshop:
+def enroll_student(db: Session, workshop_id: int, student_id: int):
+    already_enrolled = db.query(models.workshop_enrollments.c.user_id).filter(
+        models.workshop_enrollments.c.workshop_id == workshop_id,
+        models.workshop_enrollments.c.user_id == student_id
+    ).first()
+    if already_enrolled:
+        raise ValueError("Student already enrolled")
+
+    # Reserva a vaga com um único UPDATE condicional: o banco serializa as
+    # requisições concorrentes na linha da oficina, então max_students nunca é ultrapassado.
+    # As vagas livres são primeiro de quem está na fila: só sobra vaga para o aluno se
+    # houver mais vagas que pessoas à frente dele
+    reserved = db.execute(
+        update(models.Workshop)
+        .where(
+            models.Workshop.id == workshop_id,
+            models.Workshop.enrolled_count + _waitlist_ahead_count(workshop_id, student_id)
+            < models.Workshop.max_students
+        )
+        .values(enrolled_count=models.Workshop.enrolled_count + 1)
+    )
+    if reserved.rowcount == 0:
+        workshop = db.query(models.Workshop.enrolled_count, models.Workshop.max_students).filter(
+            models.Workshop.id == workshop_id
+        ).first()
+        db.rollback()
+        if not workshop:
+            return None
+        if workshop.enrolled_count < workshop.max_students:
+            raise ValueError("Students on the waitlist come first")
+        raise ValueError("Workshop is full")
+
+    try:
+        db.execute(
+            insert(models.workshop_enrollments).values(user_id=student_id, workshop_id=workshop_id)
+        )
+        # Quem conseguiu a vaga sai da fila de espera na mesma transação
+        db.execute(_waitlist_entry_delete(workshop_id, student_id))
+        db.commit()
+    except IntegrityError:
+        # Inscrição concorrente do mesmo aluno: a constraint única desfaz a reserva
+        db.rollback()
+        raise ValueError("Student already enrolled")
+    publish_workshop_change(workshop_id)
+    return True
+
+
+def _waitlist_ahead_count(workshop_id: int, student_id: int):
+    """Quantos estão na fila antes do aluno (a fila inteira, se ele não estiver nela)"""
+    waitlist = models.workshop_waitlist
+    own_entry = select(waitlist.c.id).where(
+        waitlist.c.workshop_id == workshop_id,
+        waitlist.c.user_id == student_id
+    ).scalar_subquery()
+    return select(func.count(waitlist.c.id)).where(
+        waitlist.c.workshop_id == workshop_id,
+        waitlist.c.user_id != student_id,
+        or_(own_entry.is_(None), waitlist.c.id < own_entry)
+    ).scalar_subquery()
+
+
+def _lock_workshop(db: Session, workshop_id: int):
+    """Trava a linha da oficina até o fim da transação (SELECT ... FOR UPDATE).
+
+    Serializa entrada na fila e desistência: sem isso uma desistência podia ver a
+    fila vazia e devolver a vaga enquanto outro aluno entrava nela.
+    """
+    return db.execute(
+        select(models.Workshop.enrolled_count, models.Workshop.max_students)
+        .where(models.Workshop.id == workshop_id)
+        .with_for_update()
+    ).first()
+
+
+def _waitlist_entry_delete(workshop_id: int, student_id: int):
+    return delete(models.workshop_waitlist).where(
+        models.workshop_waitlist.c.workshop_id == workshop_id,
+        models.workshop_waitlist.c.user_id == student_id
+    )
+
+
+def _pop_waitlist(db: Session, workshop_id: int):
+    """Remove e devolve o primeiro aluno da fila, ou None se ela estiver vazia.
+
+    No Postgres o SKIP LOCKED faz desistências simultâneas promoverem alunos
+    diferentes em vez de esperarem pela mesma linha.
+    """
+    waitlist = models.workshop_waitlist
+    next_entry = (
+        select(waitlist.c.id)
+        .where(waitlist.c.workshop_id == workshop_id)
+        .order_by(waitlist.c.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return db.execute(
+        delete(waitlist).where(waitlist.c.id == next_entry).returning(waitlist.c.user_id)
+    ).scalar()
+
+
+def _promote_from_waitlist(db: Session, workshop_id: int):
+    """Passa a vaga liberada para o próximo da fila; retorna o id do aluno promovido"""
+    while True:
+        student_id = _pop_waitlist(db, workshop_id)
+        if student_id is None:
+            return None
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(models.workshop_enrollments).values(user_id=student_id, workshop_id=workshop_id)
+                )
+            return student_id
+        except IntegrityError:
+            # Já inscrito por outro caminho: a entrada da fila era obsoleta, tenta o próximo
+            continue
+
+
+def _release_seat(db: Session, workshop_id: int, student_id: int) -> bool:
+    """Remove a inscrição e repassa a vaga para a fila, sem commit"""
+    workshop = _lock_workshop(db, workshop_id)
+    if workshop is None:
         return False
 
-    db.delete(db_workshop)
+    removed = db.execute(
+        delete(models.workshop_enrollments).where(
+            models.workshop_enrollments.c.workshop_id == workshop_id,
+            models.workshop_enrollments.c.user_id == student_id
+        )
+    )
+    if removed.rowcount == 0:
+        return False
+
+    # Com promoção a vaga troca de dono e o contador fica como está. Se max_students
+    # foi reduzido abaixo dos inscritos, a vaga liberada não existe mais: só decrementa
+    promoted = None
+    if workshop.enrolled_count <= workshop.max_students:
+        promoted = _promote_from_waitlist(db, workshop_id)
+    if promoted is None:
+        db.execute(
+            update(models.Workshop)
+            .where(models.Workshop.id == workshop_id)
+            .values(enrolled_count=models.Workshop.enrolled_count - 1)
+        )
+    return True
+
+
+def _fill_from_waitlist(db: Session, workshop_id: int):
+    """Promove da fila até ocupar as vagas livres (ex.: depois de aumentar max_students)"""
+    workshop = _lock_workshop(db, workshop_id)
+    promoted = 0
+    for _ in range(max(workshop.max_students - workshop.enrolled_count, 0)):
+        if _promote_from_waitlist(db, workshop_id) is None:
+            break
+        promoted += 1
+    if promoted:
+        db.execute(
+            update(models.Workshop)
+            .where(models.Workshop.id == workshop_id)
+            .values(enrolled_count=models.Workshop.enrolled_count + promoted)
+        )
+
+
+def unenroll_student(db: Session, workshop_id: int, student_id: int):
+    if not _release_seat(db, workshop_id, student_id):
+        db.rollback()
+        return False
     db.commit()
+    publish_workshop_change(workshop_id)
     return True
 
 
-def enroll_student(db: Session, workshop_id: int, student_id: int):
-    workshop = get_workshop(db, workshop_id)
-    if not workshop:
-        return None
+def release_student_seats(db: Session, student_id: int):
+    """Libera todas as vagas e entradas de fila do aluno (antes de excluí-lo), sem commit.
 
-    if len(workshop.students) >= workshop.max_students:
-        raise ValueError("Workshop is full")
+    Retorna os ids das oficinas afetadas, para publicar as mudanças depois do commit.
+    """
+    # Ordem fixa das oficinas: duas exclusões simultâneas travam as linhas na mesma ordem
+    workshop_ids = [
+        workshop_id for (workshop_id,) in db.query(models.workshop_enrollments.c.workshop_id).filter(
+            models.workshop_enrollments.c.user_id == student_id
+        ).order_by(models.workshop_enrollments.c.workshop_id)
+    ]
+    for workshop_id in workshop_ids:
+        _release_seat(db, workshop_id, student_id)
+    db.execute(delete(models.workshop_waitlist).where(models.workshop_waitlist.c.user_id == student_id))
+    return workshop_ids
+
+
+def join_waitlist(db: Session, workshop_id: int, student_id: int):
+    """Coloca o aluno na fila de uma oficina lotada e retorna a posição dele"""
+    workshop = _lock_workshop(db, workshop_id)
+    if workshop is None:
+        db.rollback()
+        return None
 
-    if any(student.id == student_id for student in workshop.students):
+    already_enrolled = db.query(models.workshop_enrollments.c.user_id).filter(
+        models.workshop_enrollments.c.workshop_id == workshop_id,
+        models.workshop_enrollments.c.user_id == student_id
+    ).first()
+    if already_enrolled:
+        db.rollback()
         raise ValueError("Student already enrolled")
+    queue_is_empty = db.query(models.workshop_waitlist.c.id).filter(
+        models.workshop_waitlist.c.workshop_id == workshop_id
+    ).first() is None
+    # Com fila formada (ex.: max_students aumentado) as vagas novas são dela: entra no fim
+    if workshop.enrolled_count < workshop.max_students and queue_is_empty:
+        db.rollback()
+        raise ValueError("Workshop has free spots, enroll instead")
+
+    try:
+        db.execute(insert(models.workshop_waitlist).values(workshop_id=workshop_id, user_id=student_id))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Student already on the waitlist")
+    return get_waitlist_position(db, workshop_id, student_id)
 
-    student = db.query(models.User).filter(models.User.id == student_id).first()
-    if not student:
-        raise ValueError("Student not found")
 
-    workshop.students.append(student)
+def leave_waitlist(db: Session, workshop_id: int, student_id: int):
+    removed = db.execute(_waitlist_entry_delete(workshop_id, student_id))
     db.commit()
-    return workshop
+    return removed.rowcount > 0
+
+
+def get_waitlist_position(db: Session, workshop_id: int, student_id: int):
+    """Posição (a partir de 1) do aluno na fila, ou None se ele não estiver nela"""
+    waitlist = models.workshop_waitlist
+    own_entry = select(waitlist.c.id).where(
+        waitlist.c.workshop_id == workshop_id,
+        waitlist.c.user_id == student_id
+    ).scalar_subquery()
+    position = db.query(func.count(waitlist.c.id)).filter(
+        waitlist.c.workshop_id == workshop_id,
+        waitlist.c.id <= own_entry
+    ).scalar()
+    return position or None
 
 
 def get_workshop_students(db: Session, workshop_id: int):
@@ -86,4 +388,88 @@ def delete_workshop(db: Session, workshop_id: int):
     
     db.delete(db_workshop)
     db.commit()
-    return True
\ No newline at end of file
+    publish_workshop_change(workshop_id)
+    return True
+
+
+# Versões aguardáveis para o modo DATABASE_ASYNC (ver users_crud). Leituras e escritas
+# simples usam a AsyncSession diretamente; inscrição, fila e paginação reaproveitam a
+# lógica transacional acima via run_sync, que também aguarda o driver assíncrono
+async def get_workshop_async(db: AsyncSession, workshop_id: int):
+    result = await db.execute(select(models.Workshop).where(models.Workshop.id == workshop_id))
+    return result.scalars().first()
+
+
+async def get_workshops_async(db: AsyncSession, skip: int = 0, limit: int = 100, published_only: bool = False,
+                              filters: schemas.WorkshopFilters = None, fields: tuple = None):
+    query = with_fields(select(models.Workshop), models.Workshop, fields)
+    query = apply_filters(query, published_only, filters)
+    result = await db.execute(order_by_key(query, models.Workshop).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def get_workshops_page_async(db: AsyncSession, cursor: str = None, limit: int = 100, published_only: bool = False,
+                                   filters: schemas.WorkshopFilters = None, fields: tuple = None):
+    return await db.run_sync(get_workshops_page, cursor, limit, published_only, filters, fields)
+
+
+async def get_workshop_facets_async(db: AsyncSession, published_only: bool = False,
+                                    filters: schemas.WorkshopFilters = None):
+    return await db.run_sync(get_workshop_facets, published_only, filters)
+
+
+async def get_user_workshops_async(db: AsyncSession, user_id: int):
+    result = await db.execute(select(models.Workshop).where(models.Workshop.professor_id == user_id))
+    return result.scalars().all()
+
+
+async def create_workshop_async(db: AsyncSession, workshop: schemas.WorkshopCreate, professor_id: int):
+    db_workshop = models.Workshop(**workshop.dict(), professor_id=professor_id)
+    db.add(db_workshop)
+    await db.commit()
+    await db.refresh(db_workshop)
+    publish_workshop_change(db_workshop.id)
+    return db_workshop
+
+
+async def update_workshop_async(db: AsyncSession, workshop_id: int, workshop_update: schemas.WorkshopUpdate):
+    return await db.run_sync(update_workshop, workshop_id, workshop_update)
+
+
+async def delete_workshop_async(db: AsyncSession, workshop_id: int):
+    db_workshop = await get_workshop_async(db, workshop_id)
+    if not db_workshop:
+        return False
+
+    await db.delete(db_workshop)
+    await db.commit()
+    publish_workshop_change(workshop_id)
+    return True
+
+
+async def enroll_student_async(db: AsyncSession, workshop_id: int, student_id: int):
+    return await db.run_sync(enroll_student, workshop_id, student_id)
+
+
+async def unenroll_student_async(db: AsyncSession, workshop_id: int, student_id: int):
+    return await db.run_sync(unenroll_student, workshop_id, student_id)
+
+
+async def join_waitlist_async(db: AsyncSession, workshop_id: int, student_id: int):
+    return await db.run_sync(join_waitlist, workshop_id, student_id)
+
+
+async def leave_waitlist_async(db: AsyncSession, workshop_id: int, student_id: int):
+    return await db.run_sync(leave_waitlist, workshop_id, student_id)
+
+
+async def get_workshop_students_async(db: AsyncSession, workshop_id: int):
+    # A lista de alunos vem junto (selectin): lazy load não funciona na AsyncSession
+    result = await db.execute(
+        select(models.Workshop).options(selectinload(models.Workshop.students))
+        .where(models.Workshop.id == workshop_id)
+    )
+    workshop = result.scalars().first()
+    if not workshop:
+        return None
+    return workshop.students
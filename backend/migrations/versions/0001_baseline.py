@@ -0,0 +1,82 @@
+"""Esquema inicial, como criado pelo create_all antes das migrações
+
+Bancos que já existiam devem ser marcados com `alembic stamp 0001` antes do
+primeiro `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("role", sa.String(50), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "workshops",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("theme", sa.String(255)),
+        sa.Column("max_students", sa.Integer()),
+        sa.Column("prerequisites", sa.Text()),
+        sa.Column("is_published", sa.Boolean()),
+        sa.Column("is_completed", sa.Boolean()),
+        sa.Column("professor_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("start_date", sa.DateTime(timezone=True)),
+        sa.Column("end_date", sa.DateTime(timezone=True)),
+        sa.Column("schedule", sa.Text()),
+    )
+    op.create_index("ix_workshops_id", "workshops", ["id"])
+
+    op.create_table(
+        "workshop_enrollments",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("workshop_id", sa.Integer(), sa.ForeignKey("workshops.id")),
+    )
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workshop_id", sa.Integer(), sa.ForeignKey("workshops.id")),
+        sa.Column("session_date", sa.DateTime(timezone=True)),
+        sa.Column("description", sa.String(255)),
+    )
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+
+    op.create_table(
+        "attendances",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.id")),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("is_present", sa.Boolean()),
+    )
+    op.create_index("ix_attendances_id", "attendances", ["id"])
+
+
+def downgrade():
+    op.drop_table("attendances")
+    op.drop_table("sessions")
+    op.drop_table("workshop_enrollments")
+    op.drop_table("workshops")
+    op.drop_table("users")
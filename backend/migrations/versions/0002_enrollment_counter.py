@@ -0,0 +1,47 @@
+"""Contador de inscritos e remoção de duplicatas
+
+Adiciona workshops.enrolled_count, usado na reserva atômica de vagas, e
+recalcula o valor a partir de workshop_enrollments. Remove inscrições e
+presenças duplicadas para que a 0003 possa criar as constraints únicas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _delete_duplicates(table, columns):
+    # ctid (Postgres) / rowid (SQLite) identificam a linha física
+    row_id = "ctid" if op.get_bind().dialect.name == "postgresql" else "rowid"
+    same_key = " AND ".join(f"a.{column} = b.{column}" for column in columns)
+    op.execute(
+        f"DELETE FROM {table} WHERE {row_id} IN ("
+        f"SELECT a.{row_id} FROM {table} a JOIN {table} b ON {same_key} AND a.{row_id} > b.{row_id})"
+    )
+
+
+def upgrade():
+    _delete_duplicates("workshop_enrollments", ["workshop_id", "user_id"])
+    _delete_duplicates("attendances", ["session_id", "student_id"])
+
+    # Com DEFAULT constante o Postgres adiciona a coluna sem reescrever a tabela
+    op.add_column(
+        "workshops",
+        sa.Column("enrolled_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        "UPDATE workshops SET enrolled_count = ("
+        "SELECT count(*) FROM workshop_enrollments WHERE workshop_enrollments.workshop_id = workshops.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("workshops") as batch_op:
+        batch_op.drop_column("enrolled_count")
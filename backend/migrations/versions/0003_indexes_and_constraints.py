@@ -0,0 +1,63 @@
+"""Índices de inscrições, oficinas, aulas e presenças e constraints únicas
+
+No Postgres os índices são criados com CREATE INDEX CONCURRENTLY, fora de
+transação, para não bloquear escritas nas tabelas em produção. As constraints
+únicas são anexadas depois a partir do índice já pronto (ADD CONSTRAINT ...
+USING INDEX), o que exige só um lock curto.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (nome, tabela, colunas, único)
+INDEXES = [
+    ("uq_workshop_enrollments_workshop_user", "workshop_enrollments", ["workshop_id", "user_id"], True),
+    ("ix_workshop_enrollments_user_id", "workshop_enrollments", ["user_id"], False),
+    ("ix_workshops_professor_id", "workshops", ["professor_id"], False),
+    ("ix_workshops_is_published", "workshops", ["is_published"], False),
+    ("ix_workshops_created_at_id", "workshops", ["created_at", "id"], False),
+    ("ix_sessions_workshop_id", "sessions", ["workshop_id"], False),
+    ("uq_attendances_session_student", "attendances", ["session_id", "student_id"], True),
+    ("ix_attendances_student_id", "attendances", ["student_id"], False),
+    ("ix_users_created_at_id", "users", ["created_at", "id"], False),
+    ("ix_users_role_created_at_id", "users", ["role", "created_at", "id"], False),
+]
+
+UNIQUE_CONSTRAINTS = [
+    ("uq_workshop_enrollments_workshop_user", "workshop_enrollments"),
+    ("uq_attendances_session_student", "attendances"),
+]
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name, table, columns, unique=unique,
+                postgresql_concurrently=is_postgres, if_not_exists=True
+            )
+
+    if is_postgres:
+        for name, table in UNIQUE_CONSTRAINTS:
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    if is_postgres:
+        for name, table in UNIQUE_CONSTRAINTS:
+            op.drop_constraint(name, table, type_="unique")
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in reversed(INDEXES):
+            if is_postgres and (name, table) in UNIQUE_CONSTRAINTS:
+                continue
+            op.drop_index(name, table_name=table, postgresql_concurrently=is_postgres, if_exists=True)
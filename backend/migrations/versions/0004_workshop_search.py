@@ -0,0 +1,45 @@
+"""Busca textual de oficinas
+
+PostgreSQL: coluna gerada search_vector (tsvector, pesos A-D para título,
+tema, descrição e pré-requisitos) com índice GIN criado de forma concorrente.
+Adicionar a coluna gerada reescreve a tabela workshops uma vez.
+
+SQLite: tabela FTS5 workshops_fts com conteúdo externo e triggers de
+sincronização, reconstruída a partir das oficinas existentes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+from app.search import POSTGRES_DDL, SQLITE_DDL
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        add_column, create_index = POSTGRES_DDL
+        op.execute(add_column)
+        with op.get_context().autocommit_block():
+            op.execute(create_index.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+    elif dialect == "sqlite":
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO workshops_fts(workshops_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_workshops_search_vector")
+        op.execute("ALTER TABLE workshops DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("workshops_fts_insert", "workshops_fts_delete", "workshops_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS workshops_fts")
@@ -0,0 +1,40 @@
+"""Índices compostos para os filtros da listagem de oficinas
+
+Cobrem as combinações mais usadas do catálogo (publicadas por tema e período,
+oficinas de um professor por data). Criados com CONCURRENTLY no Postgres,
+como na 0003.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# (nome, colunas)
+INDEXES = [
+    ("ix_workshops_published_theme_start", ["is_published", "theme", "start_date"]),
+    ("ix_workshops_published_start", ["is_published", "start_date"]),
+    ("ix_workshops_professor_start", ["professor_id", "start_date"]),
+]
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name, "workshops", columns,
+                postgresql_concurrently=is_postgres, if_not_exists=True
+            )
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="workshops", postgresql_concurrently=is_postgres, if_exists=True)
@@ -0,0 +1,32 @@
+"""Fila de espera das oficinas
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "workshop_waitlist",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workshop_id", sa.Integer(), sa.ForeignKey("workshops.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("workshop_id", "user_id", name="uq_workshop_waitlist_workshop_user"),
+    )
+    op.create_index("ix_workshop_waitlist_workshop_id_id", "workshop_waitlist", ["workshop_id", "id"])
+    op.create_index("ix_workshop_waitlist_user_id", "workshop_waitlist", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_workshop_waitlist_user_id", table_name="workshop_waitlist")
+    op.drop_index("ix_workshop_waitlist_workshop_id_id", table_name="workshop_waitlist")
+    op.drop_table("workshop_waitlist")
@@ -0,0 +1,41 @@
+"""Resumo de presenças por aluno e oficina
+
+Cria attendance_summaries e preenche os contadores a partir das presenças já
+registradas. Depois disso eles são mantidos por record_attendance; para
+recalcular: python -m app.attendance rebuild
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "attendance_summaries",
+        sa.Column("workshop_id", sa.Integer(), sa.ForeignKey("workshops.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("present_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_attendance_summaries_student_id", "attendance_summaries", ["student_id"])
+    op.execute(
+        "INSERT INTO attendance_summaries (workshop_id, student_id, present_count, total_count) "
+        "SELECT sessions.workshop_id, attendances.student_id, "
+        "SUM(CASE WHEN attendances.is_present THEN 1 ELSE 0 END), COUNT(attendances.id) "
+        "FROM attendances JOIN sessions ON sessions.id = attendances.session_id "
+        "WHERE sessions.workshop_id IS NOT NULL AND attendances.student_id IS NOT NULL "
+        "GROUP BY sessions.workshop_id, attendances.student_id"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_attendance_summaries_student_id", table_name="attendance_summaries")
+    op.drop_table("attendance_summaries")
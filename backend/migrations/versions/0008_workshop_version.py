@@ -0,0 +1,28 @@
+"""Versão das oficinas para os ETags
+
+Adiciona workshops.version, incrementada a cada UPDATE. O updated_at não basta:
+duas alterações no mesmo segundo geravam o mesmo ETag.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "workshops",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("workshops") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,62 @@
+"""Benchmark do login sob carga concorrente: bcrypt no event loop x no pool de hash.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_password_hashing --logins 64 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float = 0.01):
+    """Maior atraso observado para acordar o event loop durante o teste"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run(label, login, logins):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag_task
+    assert all(results)
+    print(f"{label:<8} {logins / elapsed:8.1f} logins/s   max event loop lag {worst_lag * 1000:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+    # O benchmark não usa o banco
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    from app import auth
+
+    hashed = auth.get_password_hash("123456")
+    print(f"bcrypt rounds={auth.PASSWORD_HASH_ROUNDS} workers={auth.PASSWORD_HASH_WORKERS} logins={args.logins}")
+
+    async def inline_login():
+        return auth.verify_password("123456", hashed)
+
+    async def pooled_login():
+        return await auth.verify_password_async("123456", hashed)
+
+    await _run("inline", inline_login, args.logins)
+    await _run("pooled", pooled_login, args.logins)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
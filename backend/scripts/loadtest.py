@@ -0,0 +1,359 @@
+"""Teste de carga dos caminhos mais usados da API.
+
+Cenários: login em /token, listagem /workshops/?published_only=true, /users/me e
+N alunos disputando ao mesmo tempo as vagas de uma oficina (POST /workshops/{id}/enroll).
+
+Por padrão a aplicação roda no próprio processo (ASGI, sem servidor) com um
+SQLite temporário. Com --url a carga vai para um uvicorn local; nesse caso
+--database-url deve apontar para o mesmo banco do servidor e SECRET_KEY deve ser
+o mesmo, pois o script cria os dados e gera os tokens diretamente.
+
+Uso (dentro de backend/):
+    python -m scripts.loadtest --requests 500 --concurrency 50 --output results.json
+    python -m scripts.loadtest --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+PASSWORD = "loadtest-123"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="API já em execução (ex.: http://127.0.0.1:8145); padrão: ASGI no processo")
+    parser.add_argument("--database-url", help="banco usado para criar os dados; padrão: SQLite temporário")
+    parser.add_argument("--requests", type=int, default=300, help="requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--login-requests", type=int, default=None, help="requisições de login (bcrypt é caro); padrão: --requests")
+    parser.add_argument("--students", type=int, default=200, help="alunos disputando a oficina")
+    parser.add_argument("--seats", type=int, default=25, help="vagas da oficina disputada")
+    parser.add_argument("--workshops", type=int, default=100, help="oficinas publicadas na listagem")
+    parser.add_argument("--hash-rounds", type=int, default=None, help="custo do bcrypt (PASSWORD_HASH_ROUNDS)")
+    parser.add_argument("--output", default="loadtest_results.json")
+    parser.add_argument("--baseline", help="resultado anterior para comparação")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Precisa rodar antes de importar a aplicação, que lê a configuração no import"""
+    if not args.database_url:
+        path = os.path.join(tempfile.mkdtemp(prefix="ellp-loadtest-"), "loadtest.db")
+        args.database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = args.database_url
+    if args.hash_rounds:
+        os.environ["PASSWORD_HASH_ROUNDS"] = str(args.hash_rounds)
+
+
+def seed(args):
+    from app import models
+    from app.auth import create_access_token, get_password_hash
+    from app.database import Base, SessionLocal, init_engine
+
+    Base.metadata.create_all(bind=init_engine())
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    password_hash = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        professor = models.User(
+            email=f"loadtest-prof-{run_id}@ellp.com", name="Professor carga",
+            password_hash=password_hash, role="professor"
+        )
+        db.add(professor)
+        db.flush()
+        students = [
+            models.User(
+                email=f"loadtest-{run_id}-{index}@ellp.com", name=f"Aluno {index}",
+                password_hash=password_hash, role="aluno"
+            )
+            for index in range(args.students)
+        ]
+        db.add_all(students)
+        db.add_all(
+            models.Workshop(
+                title=f"Oficina de carga {index}", description="Oficina criada pelo teste de carga",
+                theme="carga", max_students=30, is_published=True, professor_id=professor.id
+            )
+            for index in range(args.workshops)
+        )
+        race = models.Workshop(
+            title="Oficina disputada", max_students=args.seats, is_published=True, professor_id=professor.id
+        )
+        db.add(race)
+        db.commit()
+        return {
+            "login_email": students[0].email,
+            "tokens": [create_access_token({"sub": student.email}) for student in students],
+            "race_workshop_id": race.id,
+        }
+    finally:
+        db.close()
+
+
+def count_enrollments(workshop_id):
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return db.query(models.workshop_enrollments).filter(
+            models.workshop_enrollments.c.workshop_id == workshop_id
+        ).count()
+    finally:
+        db.close()
+
+
+class InProcessClient:
+    """Cliente ASGI mínimo: chama a aplicação diretamente, sem rede"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task = None
+        self._lifespan_queue = None
+
+    async def start(self):
+        self._lifespan_queue = asyncio.Queue()
+        started = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            if message["type"].startswith("lifespan.startup") and not started.done():
+                started.set_result(message)
+
+        async def run():
+            try:
+                await self.app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, receive, send)
+            finally:
+                if not started.done():
+                    started.set_result({"type": "lifespan.startup.complete"})
+
+        self._lifespan_task = asyncio.create_task(run())
+        await self._lifespan_queue.put({"type": "lifespan.startup"})
+        message = await started
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(message.get("message", "Application startup failed"))
+
+    async def stop(self):
+        if self._lifespan_task and not self._lifespan_task.done():
+            await self._lifespan_queue.put({"type": "lifespan.shutdown"})
+            await asyncio.wait([self._lifespan_task], timeout=5)
+
+    async def request(self, method, path, headers=None, body=None):
+        path, _, query = path.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        raw_headers = [(b"host", b"loadtest")]
+        if body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        raw_headers += [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "", "headers": raw_headers,
+            "client": ("127.0.0.1", 50000), "server": ("loadtest", 80),
+        }
+        request_sent = False
+        status = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await self.app(scope, receive, send)
+        return status[0] if status else 500
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def _request(self, method, path, headers, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=dict(headers or {}))
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    async def request(self, method, path, headers=None, body=None):
+        return await asyncio.to_thread(self._request, method, path, headers, body)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(name, client, requests, concurrency, expected_statuses=(200,)):
+    """Executa as requisições com no máximo `concurrency` em andamento"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def one(method, path, headers, body):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status = await client.request(method, path, headers, body)
+            except Exception:
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": len(requests),
+        "errors": sum(count for status, count in statuses.items() if status not in expected_statuses),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_rps": round(len(requests) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+    print(
+        f"{name:<18} {result['throughput_rps']:>9.1f} req/s  "
+        f"p50 {result['latency_ms']['p50']:>8.2f} ms  p95 {result['latency_ms']['p95']:>8.2f} ms  "
+        f"p99 {result['latency_ms']['p99']:>8.2f} ms  errors {result['errors']}"
+    )
+    return result
+
+
+async def run(args, data):
+    if args.url:
+        client = HttpClient(args.url)
+    else:
+        from app.main import app
+        client = InProcessClient(app)
+
+    await client.start()
+    try:
+        tokens = data["tokens"]
+        auth = {"Authorization": f"Bearer {tokens[0]}"}
+        login_requests = args.login_requests or args.requests
+        scenarios = {}
+        scenarios["login"] = await run_scenario(
+            "POST /token", client,
+            [("POST", "/token", None, {"email": data["login_email"], "password": PASSWORD})] * login_requests,
+            args.concurrency,
+        )
+        scenarios["list_workshops"] = await run_scenario(
+            "GET /workshops/", client,
+            [("GET", "/workshops/?published_only=true", None, None)] * args.requests,
+            args.concurrency,
+        )
+        scenarios["users_me"] = await run_scenario(
+            "GET /users/me", client,
+            [("GET", "/users/me", auth, None)] * args.requests,
+            args.concurrency,
+        )
+
+        # Todos os alunos ao mesmo tempo: só `seats` inscrições podem dar certo
+        path = f"/workshops/{data['race_workshop_id']}/enroll"
+        race = await run_scenario(
+            "enroll race", client,
+            [("POST", path, {"Authorization": f"Bearer {token}"}, None) for token in tokens],
+            len(tokens), expected_statuses=(200, 400),
+        )
+        race["seats"] = args.seats
+        race["enrolled"] = count_enrollments(data["race_workshop_id"])
+        race["accepted"] = race["statuses"].get("200", 0)
+        race["seat_limit_held"] = race["enrolled"] == race["accepted"] <= args.seats
+        scenarios["enroll_race"] = race
+        print(f"{'':<18} {race['enrolled']} enrolled for {args.seats} seats, seat limit held: {race['seat_limit_held']}")
+        return scenarios
+    finally:
+        await client.stop()
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    print(f"\nComparison with {baseline_path} ({baseline.get('timestamp')})")
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        throughput_delta = _delta(previous["throughput_rps"], current["throughput_rps"])
+        p95_delta = _delta(previous["latency_ms"]["p95"], current["latency_ms"]["p95"])
+        print(f"{name:<18} throughput {throughput_delta:>+8.1f}%   p95 latency {p95_delta:>+8.1f}%")
+
+
+def _delta(previous, current):
+    return (current - previous) / previous * 100 if previous else 0.0
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    configure_environment(args)
+
+    data = seed(args)
+    print(f"Target: {args.url or 'in-process ASGI'}  database: {args.database_url}  concurrency: {args.concurrency}")
+    scenarios = asyncio.run(run(args, data))
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": args.url or "in-process",
+        "database": args.database_url.split("://")[0],
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "students": args.students,
+            "seats": args.seats,
+            "workshops": args.workshops,
+            "hash_rounds": os.getenv("PASSWORD_HASH_ROUNDS"),
+        },
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+    if not scenarios["enroll_race"]["seat_limit_held"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+# Configuração lida no import de app.*: precisa vir antes de qualquer import da aplicação
+_DB_DIR = tempfile.mkdtemp(prefix="ellp-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import models
+from app.auth import create_access_token, principal_cache
+from app.database import SessionLocal, init_engine
+from app.main import create_app
+from app.query_stats import capture_queries
+
+
+@pytest.fixture
+def engine():
+    """Banco SQLite em arquivo, recriado a cada teste"""
+    engine = init_engine()
+    models.Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS workshops_fts"))
+    models.Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make_user(email, role="aluno", password_hash="x"):
+        user = models.User(email=email, name=email.split("@")[0], password_hash=password_hash, role=role)
+        db.add(user)
+        db.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def make_workshop(db):
+    def make_workshop(professor, max_students=20, **fields):
+        fields.setdefault("title", "Oficina")
+        fields.setdefault("is_published", True)
+        workshop = models.Workshop(max_students=max_students, professor_id=professor.id, **fields)
+        db.add(workshop)
+        db.commit()
+        return workshop
+    return make_workshop
+
+
+@pytest.fixture
+def client(engine):
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+
+@contextmanager
+def assert_max_queries(budget: int):
+    """Falha se o bloco executar mais queries que o orçamento"""
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > budget:
+        statements = "\n".join(f"  {times}x {statement}" for statement, times in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {budget} queries, got {stats.count}:\n{statements}")
+
+
+@pytest.fixture
+def query_budget():
+    """Uso: `with query_budget(3): client.get("/workshops/")`"""
+    return assert_max_queries
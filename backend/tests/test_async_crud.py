@@ -0,0 +1,51 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import auth, database, schemas, users_crud, workshops
+
+
+def run_async(engine, work):
+    """Executa work(db) numa AsyncSession (aiosqlite) sobre o mesmo banco dos testes"""
+    async def main():
+        async_engine = create_async_engine(database.to_async_url(str(engine.url)))
+        try:
+            async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+                return await work(db)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+
+def test_async_user_crud_hashes_off_the_loop(engine):
+    async def work(db):
+        user = await users_crud.create_user_async(db, schemas.UserCreate(
+            email="aluno@example.com", name="Aluno", role="aluno", password="123456"))
+        await users_crud.change_user_password_async(db, user.id, "654321")
+        await users_crud.deactivate_user_async(db, user.id)
+        return await users_crud.get_user_async(db, user.id)
+
+    user = run_async(engine, work)
+    assert auth.verify_password("654321", user.password_hash)
+    assert user.is_active is False
+
+
+def test_async_enrollment_and_roster(engine, make_user):
+    professor = make_user("prof@example.com", role="professor")
+    student = make_user("aluno@example.com")
+    professor_id, student_id = professor.id, student.id
+
+    async def work(db):
+        workshop = await workshops.create_workshop_async(
+            db, schemas.WorkshopCreate(title="Oficina", max_students=2, is_published=True), professor_id)
+        assert await workshops.enroll_student_async(db, workshop.id, student_id) is True
+        listed = await workshops.get_workshops_async(db, published_only=True)
+        students = await workshops.get_workshop_students_async(db, workshop.id)
+        assert await users_crud.delete_user_async(db, student_id)
+        await db.refresh(workshop)
+        return listed, students, workshop
+
+    listed, students, workshop = run_async(engine, work)
+    assert [w.id for w in listed] == [workshop.id]
+    assert [s.id for s in students] == [student_id]
+    assert workshop.enrolled_count == 0
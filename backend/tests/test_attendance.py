@@ -0,0 +1,23 @@
+from app import attendance, models, schemas, workshops
+
+
+def test_rebuild_matches_incremental_summaries(db, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor)
+    students = [make_user(f"aluno{i}@example.com") for i in range(3)]
+    workshop_id = workshop.id
+    for student in students:
+        workshops.enroll_student(db, workshop_id, student.id)
+
+    for present in ([True, False, True], [True, True, False]):
+        session = models.Session(workshop_id=workshop_id)
+        db.add(session)
+        db.commit()
+        records = [schemas.AttendanceRecord(student_id=student.id, is_present=is_present)
+                   for student, is_present in zip(students, present)]
+        attendance.record_attendance(db, session, records)
+
+    incremental = attendance.get_workshop_summary(db, workshop_id)
+    assert attendance.rebuild_summaries(db, workshop_id) == 3
+    assert attendance.get_workshop_summary(db, workshop_id) == incremental
+    assert [row["present_count"] for row in incremental] == [2, 1, 1]
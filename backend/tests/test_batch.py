@@ -0,0 +1,36 @@
+import pytest
+
+from app import batch
+from conftest import auth_headers
+
+
+@pytest.mark.parametrize("path", ["/workshops/stream", "/admin/export/enrollments", "/metrics", "/batch"])
+def test_unbatchable_paths_are_rejected(client, path):
+    response = client.post("/batch", json={"requests": [{"path": path}]})
+    assert response.status_code == 422
+
+
+def test_batch_runs_reads(client, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    make_workshop(professor)
+    headers = auth_headers(professor)
+
+    response = client.post("/batch", headers=headers, json={"requests": [
+        {"id": "list", "path": "/workshops/?published_only=true"},
+        {"id": "me", "path": "/users/me"},
+    ]})
+    assert response.status_code == 200
+    listing, me = response.json()["responses"]
+    assert listing["status"] == 200 and len(listing["body"]) == 1
+    assert me["status"] == 200 and me["body"]["email"] == "prof@example.com"
+
+
+def test_oversized_sub_response_is_cut_off(client, make_user, make_workshop, monkeypatch):
+    professor = make_user("prof@example.com", role="professor")
+    for i in range(5):
+        make_workshop(professor, title=f"Oficina {i}")
+    monkeypatch.setattr(batch, "BATCH_MAX_BODY_BYTES", 100)
+
+    response = client.post("/batch", json={"requests": [{"path": "/workshops/"}]})
+    assert response.status_code == 200
+    assert response.json()["responses"][0]["status"] == 413
@@ -0,0 +1,165 @@
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import models, schemas, users_crud, workshops
+from app.database import SessionLocal
+
+STUDENTS = 40
+SEATS = 5
+
+
+def _enroll(workshop_id, student_id, results):
+    db = SessionLocal()
+    try:
+        # SQLite em arquivo devolve "database is locked" quando o busy timeout estoura:
+        # é disputa pelo arquivo, não pela vaga, então tenta de novo
+        for _ in range(50):
+            try:
+                results.append(workshops.enroll_student(db, workshop_id, student_id))
+                return
+            except ValueError as e:
+                results.append(str(e))
+                return
+            except OperationalError:
+                db.rollback()
+        results.append("gave up")
+    finally:
+        db.close()
+
+
+def test_concurrent_enrollments_respect_seat_limit(db, make_user, make_workshop):
+    professor = make_user("prof@ellp.com", role="professor")
+    workshop = make_workshop(professor, max_students=SEATS)
+    student_ids = [make_user(f"s{i}@ellp.com").id for i in range(STUDENTS)]
+
+    results = []
+    threads = [threading.Thread(target=_enroll, args=(workshop.id, student_id, results))
+               for student_id in student_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    accepted = results.count(True)
+    rows = db.query(models.workshop_enrollments).filter(
+        models.workshop_enrollments.c.workshop_id == workshop.id
+    ).count()
+    db.refresh(workshop)
+    assert len(results) == STUDENTS
+    assert results.count("Workshop is full") == STUDENTS - SEATS
+    assert accepted == rows == workshop.enrolled_count == SEATS
+
+
+def test_enroll_twice_and_unenroll(db, make_user, make_workshop):
+    professor = make_user("prof@ellp.com", role="professor")
+    workshop = make_workshop(professor, max_students=2)
+    student = make_user("aluno@ellp.com")
+
+    assert workshops.enroll_student(db, workshop.id, student.id) is True
+    with pytest.raises(ValueError, match="Student already enrolled"):
+        workshops.enroll_student(db, workshop.id, student.id)
+
+    assert workshops.unenroll_student(db, workshop.id, student.id) is True
+    assert workshops.unenroll_student(db, workshop.id, student.id) is False
+    db.refresh(workshop)
+    assert workshop.enrolled_count == 0
+    assert workshops.enroll_student(db, 999, student.id) is None
+
+
+def test_freed_seat_goes_to_waitlist_before_newcomers(db, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor, max_students=1)
+    first, queued, newcomer = (make_user(f"aluno{i}@example.com") for i in range(3))
+    workshop_id = workshop.id
+
+    workshops.enroll_student(db, workshop_id, first.id)
+    assert workshops.join_waitlist(db, workshop_id, queued.id) == 1
+
+    workshop.max_students = 2
+    db.commit()
+    with pytest.raises(ValueError, match="waitlist come first"):
+        workshops.enroll_student(db, workshop_id, newcomer.id)
+    assert workshops.join_waitlist(db, workshop_id, newcomer.id) == 2
+
+    assert workshops.enroll_student(db, workshop_id, queued.id) is True
+    assert workshops.get_waitlist_position(db, workshop_id, queued.id) is None
+
+
+def test_no_promotion_when_capacity_was_reduced(db, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor, max_students=2)
+    first, second, queued = (make_user(f"aluno{i}@example.com") for i in range(3))
+    workshop_id = workshop.id
+
+    workshops.enroll_student(db, workshop_id, first.id)
+    workshops.enroll_student(db, workshop_id, second.id)
+    workshops.join_waitlist(db, workshop_id, queued.id)
+    workshop.max_students = 1
+    db.commit()
+
+    assert workshops.unenroll_student(db, workshop_id, first.id)
+    db.refresh(workshop)
+    assert workshop.enrolled_count == 1
+    assert workshops.get_waitlist_position(db, workshop_id, queued.id) == 1
+
+    # Agora a desistência libera uma vaga que existe: o primeiro da fila a recebe
+    assert workshops.unenroll_student(db, workshop_id, second.id)
+    db.refresh(workshop)
+    assert workshop.enrolled_count == 1
+    assert [student.id for student in workshop.students] == [queued.id]
+
+
+def test_deleting_enrolled_student_frees_the_seat(db, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor, max_students=1)
+    leaving, queued = make_user("aluno0@example.com"), make_user("aluno1@example.com")
+    other = make_workshop(professor, max_students=2)
+    workshop_id, other_id, leaving_id = workshop.id, other.id, leaving.id
+
+    workshops.enroll_student(db, workshop_id, leaving_id)
+    workshops.enroll_student(db, other_id, leaving_id)
+    workshops.join_waitlist(db, workshop_id, queued.id)
+
+    assert users_crud.delete_user(db, leaving_id)
+    db.expire_all()
+    # A vaga da oficina lotada foi para o primeiro da fila; a outra voltou a ficar livre
+    assert [student.id for student in workshop.students] == [queued.id]
+    assert workshop.enrolled_count == 1
+    assert other.students == [] and other.enrolled_count == 0
+
+
+def test_raising_capacity_promotes_the_waitlist(db, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor, max_students=1)
+    first, second, third, newcomer = (make_user(f"aluno{i}@example.com") for i in range(4))
+    workshop_id = workshop.id
+
+    workshops.enroll_student(db, workshop_id, first.id)
+    workshops.join_waitlist(db, workshop_id, second.id)
+    workshops.join_waitlist(db, workshop_id, third.id)
+
+    workshops.update_workshop(db, workshop_id, schemas.WorkshopUpdate(max_students=4))
+    db.refresh(workshop)
+    assert workshop.enrolled_count == 3
+    assert workshops.get_waitlist_position(db, workshop_id, third.id) is None
+    assert workshops.enroll_student(db, workshop_id, newcomer.id) is True
+
+
+def test_newcomer_gets_seats_left_over_by_the_queue(db, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor, max_students=1)
+    first, queued, newcomer = (make_user(f"aluno{i}@example.com") for i in range(3))
+    workshop_id = workshop.id
+
+    workshops.enroll_student(db, workshop_id, first.id)
+    workshops.join_waitlist(db, workshop_id, queued.id)
+    # Sem passar por update_workshop: duas vagas livres e um aluno na fila
+    workshop.max_students = 3
+    db.commit()
+
+    assert workshops.enroll_student(db, workshop_id, newcomer.id) is True
+    with pytest.raises(ValueError, match="waitlist come first"):
+        workshops.enroll_student(db, workshop_id, make_user("aluno9@example.com").id)
+    assert workshops.enroll_student(db, workshop_id, queued.id) is True
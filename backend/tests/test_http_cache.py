@@ -0,0 +1,21 @@
+from conftest import auth_headers
+
+
+def test_etag_changes_on_edits_within_the_same_second(client, make_user, make_workshop):
+    professor = make_user("prof@example.com", role="professor")
+    workshop = make_workshop(professor)
+    headers = auth_headers(professor)
+    url = f"/workshops/{workshop.id}"
+
+    first = client.get(url, headers=headers)
+    listing = client.get("/workshops/", headers=headers)
+    assert client.put(url, headers=headers, json={"title": "Renomeada"}).status_code == 200
+
+    response = client.get(url, headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renomeada"
+    response = client.get("/workshops/", headers={**headers, "If-None-Match": listing.headers["etag"]})
+    assert response.status_code == 200
+
+    current = client.get(url, headers=headers).headers["etag"]
+    assert client.get(url, headers={**headers, "If-None-Match": current}).status_code == 304
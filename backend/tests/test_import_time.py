@@ -0,0 +1,6 @@
+from scripts.check_import_time import IMPORT_BUDGET_MS, best_import_ms
+
+
+def test_app_import_is_fast_and_opens_no_connection():
+    # O processo filho falha (SystemExit) se o import criar a engine
+    assert best_import_ms(runs=3) <= IMPORT_BUDGET_MS
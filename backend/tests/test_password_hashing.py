@@ -0,0 +1,22 @@
+import threading
+
+from app import auth
+
+
+def test_import_hashing_does_not_queue_behind_logins():
+    """Com o pool de logins ocupado, a importação ainda consegue gerar hashes"""
+    release = threading.Event()
+    busy = [auth._password_hash_executor.submit(release.wait, 10) for _ in range(auth.PASSWORD_HASH_WORKERS)]
+    try:
+        hashes = auth.hash_passwords(["123456", "654321"])
+        assert all(auth.verify_password(pw, h) for pw, h in zip(["123456", "654321"], hashes))
+    finally:
+        release.set()
+        for future in busy:
+            future.result()
+
+
+def test_pooled_hash_matches_password():
+    hashed = auth.get_password_hash_pooled("segredo")
+    assert auth.verify_password("segredo", hashed)
+    assert not auth.password_needs_rehash(hashed)
@@ -0,0 +1,13 @@
+from sqlalchemy import create_engine
+
+from app.pool import InstrumentedQueuePool, engine_options
+
+
+def test_instrumented_pool_keeps_sqlalchemy_logger(tmp_path):
+    url = f"sqlite:///{tmp_path}/pool.db"
+    engine = create_engine(url, **engine_options(url))
+    try:
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+        assert engine.pool.logger.name == "sqlalchemy.pool.impl.QueuePool"
+    finally:
+        engine.dispose()
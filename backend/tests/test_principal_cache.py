@@ -0,0 +1,23 @@
+from app.auth import PrincipalCache, principal_cache
+from app.metrics import registry
+
+
+def test_invalidation_during_lookup_discards_stale_fill(make_user):
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    user = make_user("aluno@example.com")
+
+    token = cache.read_token(user.email)
+    cache.invalidate(user.email)
+    cache.set(user.email, user, token)
+    assert cache.get(user.email) is None
+
+    cache.set(user.email, user, cache.read_token(user.email))
+    assert cache.get(user.email).email == user.email
+    assert cache.stats()["stale_sets"] == 1
+
+
+def test_cache_stats_are_exported_in_metrics():
+    principal_cache.clear()
+    output = registry.render()
+    assert 'principal_cache_requests_total{result="hit"}' in output
+    assert "principal_cache_entries 0" in output
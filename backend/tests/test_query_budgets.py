@@ -0,0 +1,79 @@
+import pytest
+
+from app import attendance, models, schemas, workshops
+from conftest import auth_headers
+
+STUDENTS = 12
+WORKSHOPS = 6
+
+
+@pytest.fixture
+def catalog(db, make_user, make_workshop):
+    """Oficinas com vários inscritos: uma carga preguiçosa por linha estoura o orçamento"""
+    professor = make_user("prof@example.com", role="professor")
+    admin = make_user("admin@example.com", role="admin")
+    # Alunos criados antes das inscrições: nenhum commit expira coleções já carregadas
+    students = [make_user(f"aluno{i}@example.com") for i in range(STUDENTS)]
+    catalog_workshops = [make_workshop(professor, max_students=STUDENTS, title=f"Oficina de Python {i}")
+                         for i in range(WORKSHOPS)]
+    ids = {
+        "professor": professor.id, "admin": admin.id,
+        "student": students[0].id, "workshop": catalog_workshops[0].id,
+        "students": [student.id for student in students],
+        "emails": {"professor": professor.email, "admin": admin.email, "student": students[0].email},
+    }
+    for workshop_id in (workshop.id for workshop in catalog_workshops):
+        for student_id in ids["students"]:
+            workshops.enroll_student(db, workshop_id, student_id)
+
+    session = models.Session(workshop_id=ids["workshop"])
+    db.add(session)
+    db.commit()
+    attendance.record_attendance(db, session, [
+        schemas.AttendanceRecord(student_id=student_id, is_present=True) for student_id in ids["students"]
+    ])
+    return ids
+
+
+# (rota, quem chama, orçamento). O orçamento inclui a consulta do usuário do token
+BUDGETS = [
+    ("/workshops/?published_only=true", None, 2),
+    ("/workshops/?cursor=", None, 2),
+    ("/workshops/{workshop}", None, 2),
+    ("/workshops/facets", None, 1),
+    ("/workshops/search?q=python", None, 1),
+    ("/workshops/my-workshops", "professor", 2),
+    ("/workshops/{workshop}/students", "professor", 4),
+    ("/workshops/{workshop}/attendance-summary", "professor", 3),
+    ("/users/me", "student", 1),
+    ("/users/{student}", None, 1),
+    ("/users/me/enrollments", "student", 3),
+    ("/users/me/enrollments-direct", "student", 2),
+    ("/users/{student}/enrollments", "admin", 3),
+    ("/users/", "admin", 2),
+    ("/users/students/", "admin", 2),
+    ("/admin/export/enrollments", "admin", 2),
+]
+
+
+@pytest.mark.parametrize("path, caller, budget", BUDGETS)
+def test_read_endpoint_query_budget(client, catalog, query_budget, path, caller, budget):
+    url = path.format(**catalog)
+    headers = auth_headers(models.User(email=catalog["emails"][caller])) if caller else {}
+
+    with query_budget(budget):
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_enrollment_query_budget(client, make_user, make_workshop, query_budget):
+    professor = make_user("prof@example.com", role="professor")
+    student = make_user("aluno@example.com")
+    workshop = make_workshop(professor, max_students=5)
+
+    url, headers = f"/workshops/{workshop.id}/enroll", auth_headers(student)
+
+    # Usuário do token, checagem de duplicidade, reserva da vaga, inscrição e limpeza da fila
+    with query_budget(5):
+        response = client.post(url, headers=headers)
+    assert response.status_code == 200
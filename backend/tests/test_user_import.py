@@ -0,0 +1,22 @@
+import io
+
+from app import models, user_import
+
+CSV = b"""email,name,password,role
+novo1@example.com,Novo 1,123456,aluno
+existente@example.com,Existente,123456,aluno
+novo2@example.com,Novo 2,123456,aluno
+"""
+
+
+def test_import_reports_only_rows_that_really_conflict(db, make_user, monkeypatch):
+    make_user("existente@example.com")
+    # Simula um cadastro concorrente entre a consulta de emails e o INSERT do bloco
+    monkeypatch.setattr(user_import, "_existing_emails", lambda db, emails: set())
+
+    result = user_import.import_users(db, io.BytesIO(CSV), "csv")
+
+    assert result["created"] == 2
+    assert result["errors"] == [{"row": 3, "email": "existente@example.com", "error": "Email already registered"}]
+    emails = {email for (email,) in db.query(models.User.email)}
+    assert {"novo1@example.com", "novo2@example.com"} <= emails
@@ -1,4 +1,4 @@
 INSERT INTO users (email, name, password_hash, role) VALUES
-('admin@ellp.com', 'admin', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW', 'admin'),
-('professor@ellp.com', 'exemplo professor', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW', 'professor'),
-('aluno@ellp.com', 'exemplo aluno', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW', 'aluno');
\ No newline at end of file
+('admin@ellp.com', 'admin', '$2b$12$49XJCYBWmNiJ7epkjfZz1O0QK5JJLPet0q21NFcVLsF/13iEfHYEe', 'admin'),
+('professor@ellp.com', 'exemplo professor', '$2b$12$49XJCYBWmNiJ7epkjfZz1O0QK5JJLPet0q21NFcVLsF/13iEfHYEe', 'professor'),
+('aluno@ellp.com', 'exemplo aluno', '$2b$12$49XJCYBWmNiJ7epkjfZz1O0QK5JJLPet0q21NFcVLsF/13iEfHYEe', 'aluno');
\ No newline at end of file
@@ -1,5 +1,5 @@
 "use client";
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Grid,
   Card,
@@ -13,7 +13,7 @@ import {
   CircularProgress
 } from '@mui/material';
 import { CheckCircle, Cancel } from '@mui/icons-material';
-import { workshopsAPI } from '../../../services/api';
+import { batchAPI, workshopsAPI } from '../../../services/api';
 import Layout from '../../../components/Layout/Layout';
 import { useAuth } from '../../../app/contexts/AuthContext';
 import { useRouter } from 'next/navigation';
@@ -26,6 +26,12 @@ const Catalog = () => {
   const [message, setMessage] = useState('');
   const { user } = useAuth();
   const router = useRouter();
+  // Ids já exibidos, lidos pelo handler do SSE sem recriar a conexão
+  const knownIds = useRef(new Set());
+
+  useEffect(() => {
+    knownIds.current = new Set(workshops.map(workshop => workshop.id));
+  }, [workshops]);
 
   useEffect(() => {
     if (user) {
@@ -33,23 +39,62 @@ const Catalog = () => {
     }
   }, [user]);
 
+  // Vagas atualizadas pelo servidor (SSE) em vez de recarregar a lista
+  useEffect(() => {
+    if (!user) return undefined;
+    const source = workshopsAPI.stream();
+    const removeWorkshop = (id) =>
+      setWorkshops(prev => prev.filter(workshop => workshop.id !== id));
+
+    source.addEventListener('workshop', (event) => {
+      const change = JSON.parse(event.data);
+      if (!change.is_published) {
+        removeWorkshop(change.id);
+        return;
+      }
+      if (!knownIds.current.has(change.id)) {
+        // Oficina nova ou republicada: o evento só traz as vagas, então busca a oficina inteira
+        knownIds.current.add(change.id);
+        workshopsAPI.get(change.id)
+          .then(({ data }) => setWorkshops(prev =>
+            prev.some(workshop => workshop.id === data.id) ? prev : [...prev, data]
+          ))
+          .catch(() => knownIds.current.delete(change.id));
+        return;
+      }
+      setWorkshops(prev => prev.map(workshop =>
+        workshop.id === change.id ? { ...workshop, ...change } : workshop
+      ));
+    });
+    source.addEventListener('deleted', (event) => {
+      removeWorkshop(JSON.parse(event.data).id);
+    });
+    return () => source.close();
+  }, [user]);
+
   const fetchWorkshops = async () => {
     try {
       setLoading(true);
-      const response = await workshopsAPI.getAll(true);
-      const workshopsData = response.data;
-      setWorkshops(workshopsData);
+      // Oficinas e inscrições do aluno em uma única ida ao servidor
+      const requests = [{ id: 'workshops', path: '/workshops/?published_only=true' }];
+      if (user.role === 'aluno') {
+        requests.push({ id: 'enrollments', path: '/users/me/enrollments?fields=id' });
+      }
+      const response = await batchAPI.run(requests);
+      const [workshopsResult, enrollmentsResult] = response.data.responses;
+      if (workshopsResult.status !== 200) {
+        throw new Error(workshopsResult.body?.detail || 'Error fetching workshops');
+      }
+      setWorkshops(workshopsResult.body);
 
-      // Verificar inscrições do usuário em cada oficina
       const enrollmentStatus = {};
-      for (const workshop of workshopsData) {
-        try {
-          const studentsResponse = await workshopsAPI.getStudents(workshop.id);
-          const isEnrolled = studentsResponse.data.some(student => student.id === user.id);
-          enrollmentStatus[workshop.id] = isEnrolled;
-        } catch (error) {
-          console.error(`Error checking enrollment for workshop ${workshop.id}:`, error);
-          enrollmentStatus[workshop.id] = false;
+      if (enrollmentsResult) {
+        if (enrollmentsResult.status === 200) {
+          for (const workshop of enrollmentsResult.body) {
+            enrollmentStatus[workshop.id] = true;
+          }
+        } else {
+          console.error('Error checking enrollments:', enrollmentsResult.body);
         }
       }
       setEnrollments(enrollmentStatus);
@@ -118,8 +163,7 @@ const Catalog = () => {
   };
 
   const getAvailableSpots = (workshop) => {
-    // Esta informação viria do backend, por enquanto é uma estimativa
-    return workshop.max_students;
+    return workshop.available_spots ?? workshop.max_students;
   };
 
   const isWorkshopFull = (workshop) => {
@@ -22,9 +22,17 @@ export const usersAPI = {
 };
 
 export const workshopsAPI = {
-  getAll: (publishedOnly = false) =>
-    axios.get(`${API_BASE_URL}/workshops/?published_only=${publishedOnly}`),
+  getAll: (publishedOnly = false, filters = {}) =>
+    axios.get(`${API_BASE_URL}/workshops/`, {
+      params: { published_only: publishedOnly, ...filters },
+    }),
+  getFacets: (publishedOnly = false, filters = {}) =>
+    axios.get(`${API_BASE_URL}/workshops/facets`, {
+      params: { published_only: publishedOnly, ...filters },
+    }),
   getMyWorkshops: () => axios.get(`${API_BASE_URL}/workshops/my-workshops`),
+  // Eventos "workshop" (vagas/publicação) e "deleted" via Server-Sent Events
+  stream: () => new EventSource(`${API_BASE_URL}/workshops/stream`),
   get: (workshopId) => axios.get(`${API_BASE_URL}/workshops/${workshopId}`),
   create: (workshopData) =>
     axios.post(`${API_BASE_URL}/workshops/`, workshopData),
@@ -34,8 +42,18 @@ export const workshopsAPI = {
     axios.post(`${API_BASE_URL}/workshops/${workshopId}/enroll`),
   unenroll: (workshopId) =>
     axios.delete(`${API_BASE_URL}/workshops/${workshopId}/enroll`),
+  joinWaitlist: (workshopId) =>
+    axios.post(`${API_BASE_URL}/workshops/${workshopId}/waitlist`),
+  leaveWaitlist: (workshopId) =>
+    axios.delete(`${API_BASE_URL}/workshops/${workshopId}/waitlist`),
   getStudents: (workshopId) =>
     axios.get(`${API_BASE_URL}/workshops/${workshopId}/students`),
   delete: (workshopId) =>
     axios.delete(`${API_BASE_URL}/workshops/${workshopId}`),
 };
+
+// Várias leituras em uma única requisição: cada item é { id, path } e a resposta
+// traz { id, status, headers, body } na mesma ordem
+export const batchAPI = {
+  run: (requests) => axios.post(`${API_BASE_URL}/batch`, { requests }),
+};